@@ -0,0 +1,146 @@
+import sqlite3
+from functools import lru_cache
+from itertools import count
+
+# Tablas de los DAO para los backends 'sqlite' y 'memoria' (en Postgres ya existen)
+ESQUEMA = ('CREATE TABLE IF NOT EXISTS persona (id_persona INTEGER PRIMARY KEY, nombre TEXT, '
+           'apellido TEXT, email TEXT)',
+           'CREATE TABLE IF NOT EXISTS usuario (id_usuario INTEGER PRIMARY KEY, username TEXT, '
+           'password TEXT)')
+# Máximo de parámetros por sentencia (SQLITE_MAX_VARIABLE_NUMBER)
+_MAX_PARAMETROS = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+_bases_memoria = count(1)
+
+
+@lru_cache(maxsize=256)
+def _traducir(sql):
+    # Estilo de parámetros de psycopg2 (%s) al de sqlite3 (?)
+    return sql.replace('%s', '?').replace('%%', '%')
+
+
+class CursorSQLite:
+    '''
+    Cursor de sqlite3 con la parte de la interfaz de psycopg2 que usa la capa de
+    datos: parámetros %s, itersize, with y ejecutar_valores (en lugar de execute_values)
+    '''
+    __slots__ = ('connection', '_cursor', 'rowcount', 'itersize')
+
+    def __init__(self, conexion, cursor):
+        self.connection = conexion
+        self._cursor = cursor
+        self.rowcount = -1
+        self.itersize = 2000
+
+    def execute(self, sql, valores=None):
+        self.connection._comenzar()
+        if valores is None:
+            self._cursor.execute(sql)
+        else:
+            self._cursor.execute(_traducir(sql), valores)
+        self.rowcount = self._cursor.rowcount
+
+    def ejecutar_valores(self, sql, filas, fetch=False):
+        '''VALUES multi-fila como execute_values, en trozos que respetan _MAX_PARAMETROS'''
+        resultado = []
+        if not filas:
+            return resultado
+        self.connection._comenzar()
+        columnas = len(filas[0])
+        por_sentencia = max(1, _MAX_PARAMETROS // columnas)
+        marcador = '(' + ', '.join('?' * columnas) + ')'
+        antes, despues = sql.replace('%%', '%').split('%s')
+        # rowcount de sqlite3 no cuenta las sentencias que empiezan por WITH
+        cambios = self._cursor.connection.total_changes
+        for inicio in range(0, len(filas), por_sentencia):
+            trozo = filas[inicio:inicio + por_sentencia]
+            self._cursor.execute(antes + ', '.join([marcador] * len(trozo)) + despues,
+                                 [valor for fila in trozo for valor in fila])
+            if fetch:
+                resultado.extend(self._cursor.fetchall())
+        self.rowcount = self._cursor.connection.total_changes - cambios
+        return resultado if fetch else None
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, tamano=None):
+        return self._cursor.fetchmany(tamano or self.itersize)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        # sqlite3 ya va leyendo las filas según se piden, como un cursor del servidor
+        return iter(self._cursor)
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+class ConexionSQLite:
+    '''
+    Conexión de sqlite3 que se comporta como una de psycopg2: la transacción empieza
+    con la primera sentencia (también los SELECT) y dura hasta commit() o rollback()
+    '''
+    __slots__ = ('_conexion', 'closed', '_en_transaccion', '__weakref__')
+
+    def __init__(self, conexion):
+        self._conexion = conexion
+        self.closed = 0
+        self._en_transaccion = False
+
+    def cursor(self, name=None):
+        # Con sqlite3 no hay cursores con nombre: todos leen las filas bajo demanda
+        return CursorSQLite(self, self._conexion.cursor())
+
+    def _comenzar(self):
+        if not self._en_transaccion:
+            self._conexion.execute('BEGIN')
+            self._en_transaccion = True
+
+    def commit(self):
+        if self._en_transaccion:
+            self._en_transaccion = False
+            self._conexion.execute('COMMIT')
+
+    def rollback(self):
+        if self._en_transaccion:
+            self._en_transaccion = False
+            self._conexion.execute('ROLLBACK')
+
+    def close(self):
+        self._conexion.close()
+        self.closed = 1
+
+
+def conectar(ruta, timeout=30):
+    '''
+    Abre `ruta` (un fichero o una URI file:) en modo autocommit para gestionar las
+    transacciones a mano como psycopg2. check_same_thread=False porque el pool
+    entrega la conexión a distintos hilos, aunque nunca a dos a la vez.
+    '''
+    conexion = sqlite3.connect(ruta, timeout=timeout, isolation_level=None, check_same_thread=False,
+                               uri=ruta.startswith('file:'))
+    return ConexionSQLite(conexion)
+
+
+def ruta_memoria():
+    '''
+    URI de una base en memoria compartida entre las conexiones del proceso
+    (VFS memdb): existe mientras quede alguna conexión abierta a ella
+    '''
+    return f'file:/base_{next(_bases_memoria)}?vfs=memdb'
+
+
+def crear_esquema(conexion):
+    cursor = conexion.cursor()
+    for sentencia in ESQUEMA:
+        cursor.execute(sentencia)
+    cursor.close()
+    conexion.commit()
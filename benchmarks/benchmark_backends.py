@@ -0,0 +1,92 @@
+'''
+Coste por operación de PersonaDAO en cada backend de Conexion (DB_BACKEND):
+'memoria' y 'sqlite' no necesitan servidor; 'postgres' usa la base del .env y
+borra al terminar las filas que ha creado. Cada backend se mide en su propio
+proceso porque Conexion se configura una sola vez.
+
+    python benchmarks/benchmark_backends.py [num_filas] [backend ...]
+'''
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [_RAIZ, os.path.join(_RAIZ, 'exercises', '276_287_database_layer_and_pool')]
+
+
+def medir(nombre, operaciones, funcion, *args):
+    # operaciones=None cuenta una operación por cada fila devuelta
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    segundos = time.perf_counter() - inicio
+    operaciones = operaciones or len(resultado)
+    print(f'  {nombre:<28} {segundos / operaciones * 1e6:10.1f} us/op  ({operaciones} ops)')
+    return resultado
+
+
+def ejecutar(num_filas):
+    from logger_base import log
+    from conexion import Conexion
+    from cursor_del_pool import CursorDelPool, UnidadDeTrabajo
+    from persona import Persona
+    from persona_dao import PersonaDAO
+
+    # Sin registros DEBUG: se mide la capa de datos, no el logging
+    log.getLogger().setLevel(log.WARNING)
+    sueltas = [Persona(nombre=f'Suelta{i}', apellido='Bench', email=f'suelta{i}@bench.com')
+               for i in range(num_filas // 10)]
+    lote = [Persona(nombre=f'Lote{i}', apellido='Bench', email=f'lote{i}@bench.com') for i in range(num_filas)]
+
+    def insertar_sueltas():
+        for persona in sueltas:
+            PersonaDAO.insertar(persona)
+
+    def insertar_en_unidad():
+        with UnidadDeTrabajo():
+            for persona in sueltas:
+                PersonaDAO.insertar(persona)
+
+    def leer_por_id():
+        for persona in lote[:len(sueltas)]:
+            PersonaDAO.seleccionar_por_id(persona.id_persona)
+
+    def recorrer_paginas():
+        paginas = 0
+        pagina = PersonaDAO.seleccionar_pagina(limit=500)
+        while pagina:
+            paginas += 1
+            pagina = PersonaDAO.seleccionar_pagina(after_id=pagina[-1].id_persona, limit=500)
+        return paginas
+
+    PersonaDAO.crear_indices()
+    medir('insertar (una transacción)', len(sueltas), insertar_sueltas)
+    medir('insertar en UnidadDeTrabajo', len(sueltas), insertar_en_unidad)
+    medir('insertar_lote', num_filas, PersonaDAO.insertar_lote, lote)
+    medir('seleccionar_por_id', len(sueltas), leer_por_id)
+    total = len(medir('seleccionar', None, PersonaDAO.seleccionar))
+    medir('iterar', total, lambda: sum(1 for _ in PersonaDAO.iterar()))
+    medir('seleccionar_pagina (500)', total, recorrer_paginas)
+    for persona in lote:
+        persona.apellido = 'BENCH'
+    medir('actualizar_lote', num_filas, PersonaDAO.actualizar_lote, lote)
+    medir('eliminar_lote', num_filas, PersonaDAO.eliminar_lote, lote)
+    # Las filas insertadas una a una no tienen id conocido: se borran por apellido
+    with CursorDelPool() as cursor:
+        cursor.execute('DELETE FROM persona WHERE apellido=%s', ('Bench',))
+    Conexion.cerrarConexiones()
+
+
+if __name__ == '__main__':
+    if os.getenv('BENCHMARK_BACKEND_HIJO'):
+        ejecutar(int(sys.argv[1]))
+        sys.exit()
+    num_filas = int(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1].isdigit() else 10_000
+    backends = [argumento for argumento in sys.argv[1:] if not argumento.isdigit()] or ['memoria', 'sqlite']
+    with tempfile.TemporaryDirectory() as directorio:
+        for backend in backends:
+            print(f'Backend {backend}')
+            entorno = dict(os.environ, BENCHMARK_BACKEND_HIJO='1', DB_BACKEND=backend,
+                           DB_SQLITE_RUTA=os.path.join(directorio, 'benchmark.sqlite3'))
+            subprocess.run([sys.executable, __file__, str(num_filas)], env=entorno, cwd=directorio, check=True)
@@ -0,0 +1,77 @@
+'''
+Benchmark de las entidades Persona/Usuario: bytes por objeto y filas por segundo
+al materializar registros, comparando la versión antigua (con __dict__ y
+mapeo índice a índice) con la actual (__slots__ y desde_registros).
+
+    python benchmarks/benchmark_entidades.py [num_filas]
+'''
+import os
+import sys
+import time
+import tracemalloc
+
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [_RAIZ,
+                os.path.join(_RAIZ, 'exercises', '276_287_database_layer_and_pool'),
+                os.path.join(_RAIZ, 'exercises', '293_postgre_usuarios_lab')]
+
+from persona import Persona
+from usuario import Usuario
+
+
+class PersonaConDict:
+    # Réplica de la Persona anterior a __slots__ para comparar
+    def __init__(self, id_persona=None, nombre=None, apellido=None, email=None):
+        self._id_persona = id_persona
+        self._nombre = nombre
+        self._apellido = apellido
+        self._email = email
+
+
+class UsuarioConDict:
+    def __init__(self, id_usuario=None, username=None, password=None):
+        self._id_usuario = id_usuario
+        self._username = username
+        self._password = password
+
+
+def mapear_por_indices_persona(registros):
+    personas = []
+    for registro in registros:
+        persona = PersonaConDict(registro[0], registro[1], registro[2], registro[3])
+        personas.append(persona)
+    return personas
+
+
+def mapear_por_indices_usuario(registros):
+    usuarios = []
+    for registro in registros:
+        usuario = UsuarioConDict(registro[0], registro[1], registro[2])
+        usuarios.append(usuario)
+    return usuarios
+
+
+def medir(nombre, mapear, registros):
+    inicio = time.perf_counter()
+    objetos = mapear(registros)
+    segundos = time.perf_counter() - inicio
+    del objetos
+    # Memoria medida aparte para que tracemalloc no distorsione el tiempo
+    tracemalloc.start()
+    objetos = mapear(registros)
+    memoria, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objetos
+    print(f'{nombre:<28} {memoria / len(registros):8.1f} bytes/objeto '
+          f'{len(registros) / segundos:12,.0f} filas/s')
+
+
+if __name__ == '__main__':
+    num_filas = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    registros_persona = [(i, f'Nombre{i}', f'Apellido{i}', f'correo{i}@mail.com') for i in range(num_filas)]
+    registros_usuario = [(i, f'usuario{i}', f'clave{i}') for i in range(num_filas)]
+    print(f'Materializando {num_filas:,} filas')
+    medir('Persona (dict, índices)', mapear_por_indices_persona, registros_persona)
+    medir('Persona (slots, starmap)', Persona.desde_registros, registros_persona)
+    medir('Usuario (dict, índices)', mapear_por_indices_usuario, registros_usuario)
+    medir('Usuario (slots, starmap)', Usuario.desde_registros, registros_usuario)
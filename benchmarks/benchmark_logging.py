@@ -0,0 +1,44 @@
+'''
+Microbenchmark del coste por llamada de los log.debug de insertar/actualizar/eliminar:
+f-string (se formatea siempre) frente a argumentos diferidos (solo si el nivel está activo).
+
+    python benchmarks/benchmark_logging.py [repeticiones]
+'''
+import io
+import os
+import sys
+import timeit
+
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [_RAIZ, os.path.join(_RAIZ, 'exercises', '276_287_database_layer_and_pool')]
+
+from logger_base import log, nivel_activo
+from persona import Persona
+
+persona = Persona(1, 'Juan', 'Perez', 'jperez@mail.com')
+
+
+def con_fstring():
+    log.debug(f'Persona insertada: {persona}')
+
+
+def diferido():
+    log.debug('Persona insertada: %s', persona)
+
+
+def medir(repeticiones):
+    for nombre, funcion in (('f-string', con_fstring), ('diferido', diferido)):
+        segundos = min(timeit.repeat(funcion, number=repeticiones, repeat=5))
+        print(f'  {nombre:<10} {segundos / repeticiones * 1e9:10.0f} ns/llamada')
+
+
+if __name__ == '__main__':
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    raiz = log.getLogger()
+    # Se sustituyen los manejadores de logger_base para no escribir a disco ni a consola
+    manejador = log.StreamHandler(io.StringIO())
+    raiz.handlers = [manejador]
+    for nivel in (log.INFO, log.DEBUG):
+        raiz.setLevel(nivel)
+        print(f'Nivel {log.getLevelName(nivel)} (debug activo: {nivel_activo()})')
+        medir(repeticiones if nivel == log.INFO else repeticiones // 10)
@@ -0,0 +1,30 @@
+'''
+Coste por evento del registro de métricas (objetivo: < 1 µs por evento).
+
+    python benchmarks/benchmark_metricas.py [repeticiones]
+'''
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metricas import Registro
+
+registro = Registro()
+contador = registro.contador('eventos_total')
+histograma = registro.histograma('latencia_segundos')
+_SQL = 'UPDATE persona SET nombre=%s, apellido=%s, email=%s WHERE id_persona=%s'
+
+casos = {
+    'Contador.inc': lambda: contador.inc(),
+    'Histograma.observar': lambda: histograma.observar(0.0042),
+    'Registro.observar_sql': lambda: registro.observar_sql(_SQL, 0.0042),
+    '(llamada vacía)': lambda: None,
+}
+
+if __name__ == '__main__':
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    for nombre, caso in casos.items():
+        segundos = min(timeit.repeat(caso, number=repeticiones, repeat=5))
+        print(f'{nombre:<24} {segundos / repeticiones * 1e9:8.0f} ns/evento')
@@ -0,0 +1,72 @@
+'''
+Control de regresiones en el arranque: importa cada módulo en un intérprete nuevo
+con `python -X importtime`, compara su coste con el presupuesto de
+importtime_presupuesto.json y comprueba que importar no crea ./log.
+El coste es la suma de los tiempos propios de todos los módulos que carga y que
+no carga ya `python -c "import logging"` (medido en la misma ejecución): no
+depende del orden de los import ni de lo que tarda logging en la máquina, y
+crece a lo largo del grafo de imports, porque quien importa un módulo paga
+también lo de él.
+Devuelve código de salida 1 si algún módulo se pasa o tiene efectos secundarios.
+
+    python benchmarks/importtime.py [repeticiones]
+'''
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+_DIR = os.path.dirname(os.path.abspath(__file__))
+_RAIZ = os.path.dirname(_DIR)
+_RUTAS = [_RAIZ,
+          os.path.join(_RAIZ, 'exercises', '276_287_database_layer_and_pool'),
+          os.path.join(_RAIZ, 'exercises', '293_postgre_usuarios_lab')]
+
+
+def medir_importacion(modulo, directorio):
+    '''Tiempo propio en microsegundos de cada módulo cargado al importar `modulo`'''
+    entorno = dict(os.environ, PYTHONPATH=os.pathsep.join(_RUTAS))
+    # Sin los .pyc al día cada importación mediría también la compilación
+    entorno.pop('PYTHONDONTWRITEBYTECODE', None)
+    resultado = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {modulo}'],
+                               cwd=directorio, env=entorno, capture_output=True, text=True)
+    if resultado.returncode != 0:
+        raise RuntimeError(f'No se pudo importar {modulo}:\n{resultado.stderr}')
+    # Formato de cada línea: "import time: propio | acumulado | módulo"
+    propios = {}
+    for linea in resultado.stderr.splitlines():
+        partes = linea.split('|')
+        if len(partes) == 3 and partes[1].strip().isdigit():
+            propios[partes[2].strip()] = int(partes[0].rsplit(':', 1)[1])
+    if modulo not in propios:
+        raise RuntimeError(f'No aparece {modulo} en la salida de -X importtime')
+    return propios
+
+
+def coste_importacion(modulo, directorio, base):
+    '''Suma de los tiempos propios de los módulos que `modulo` carga además de los de `base`'''
+    return sum(propio for nombre, propio in medir_importacion(modulo, directorio).items() if nombre not in base)
+
+
+if __name__ == '__main__':
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    with open(os.path.join(_DIR, 'importtime_presupuesto.json'), encoding='utf-8') as f:
+        presupuesto = json.load(f)
+    fallos = 0
+    with tempfile.TemporaryDirectory() as directorio:
+        base = set(medir_importacion('logging', directorio))
+    for modulo, limite_us in presupuesto.items():
+        with tempfile.TemporaryDirectory() as directorio:
+            # La primera importación, que puede escribir los .pyc, no cuenta
+            medir_importacion(modulo, directorio)
+            microsegundos = min(coste_importacion(modulo, directorio, base) for _ in range(repeticiones))
+            efectos = os.listdir(directorio)
+        estado = 'ok'
+        if microsegundos > limite_us:
+            estado = 'LENTO'
+        if efectos:
+            estado = f'EFECTOS {efectos}'
+        fallos += estado != 'ok'
+        print(f'{modulo:<20} {microsegundos:8} us sobre logging (presupuesto {limite_us:8} us) {estado}')
+    sys.exit(1 if fallos else 0)
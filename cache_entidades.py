@@ -0,0 +1,80 @@
+import threading
+import time
+from collections import OrderedDict
+
+from logger_base import log
+
+
+class CacheLRU:
+    '''
+    Caché por clave primaria, acotada en tamaño (se expulsa la menos usada
+    recientemente) y con caducidad ttl en segundos. Devuelve el mismo objeto a
+    todos los hilos: los DAO guardan la fila como tupla y crean la entidad en cada acierto
+    '''
+
+    def __init__(self, max_entradas=1024, ttl=60, reloj=time.monotonic):
+        if max_entradas < 1:
+            raise ValueError(f'Tamaño de caché inválido: {max_entradas}')
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._reloj = reloj
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                valor, caduca = entrada
+                if caduca > self._reloj():
+                    self._entradas.move_to_end(clave)
+                    self.aciertos += 1
+                    return valor
+                del self._entradas[clave]
+            self.fallos += 1
+            return None
+
+    def guardar(self, clave, valor):
+        with self._lock:
+            self._entradas[clave] = (valor, self._reloj() + self.ttl)
+            self._entradas.move_to_end(clave)
+            if len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+                self.expulsiones += 1
+
+    def invalidar(self, clave):
+        with self._lock:
+            self._entradas.pop(clave, None)
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {'aciertos': self.aciertos,
+                    'fallos': self.fallos,
+                    'expulsiones': self.expulsiones,
+                    'entradas': len(self._entradas),
+                    'tasa_aciertos': self.aciertos / consultas if consultas else 0.0}
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def __str__(self):
+        return f'CacheLRU(max_entradas={self.max_entradas}, ttl={self.ttl}, {self.estadisticas()})'
+
+
+if __name__ == '__main__':
+    cache = CacheLRU(max_entradas=2, ttl=0.1)
+    cache.guardar(1, 'uno')
+    cache.guardar(2, 'dos')
+    cache.obtener(1)
+    cache.guardar(3, 'tres')  # expulsa la clave 2, la menos usada
+    log.debug(f'{cache.obtener(2)} {cache.obtener(1)} {cache}')
+    time.sleep(0.2)
+    log.debug(f'Tras caducar: {cache.obtener(1)} {cache}')
@@ -1,57 +1,285 @@
 import os
 import sys
-from psycopg2  import pool
+import threading
+import time
+import weakref
+from functools import partial
+from itertools import count
 from logger_base import log
+from metricas import REGISTRO
+from pool_bloqueante import PoolAgotadoError, PoolBloqueante
 
-from dotenv import load_dotenv  # para importar las varaibles del .env
-# Cargar las variables de entorno desde el archivo .env
-load_dotenv()
+_ESPERA_CONEXION = REGISTRO.histograma('db_espera_conexion_segundos', 'Espera para obtener una conexión del pool')
+_ERRORES_CONEXION = REGISTRO.contador('db_errores_conexion_total', 'Fallos al obtener una conexión del pool')
+_DESTINOS = {destino: REGISTRO.contador('db_conexiones_total', 'Conexiones entregadas por destino',
+                                        {'destino': destino})
+             for destino in ('primaria', 'replica')}
 
 class Conexion:
-    # Leer las variables de entorno del archivo .env
-    _USERNAME = os.getenv('POSTGRE_USER')
-    _PASSWORD = os.getenv('POSTGRE_PASSWORD')
-    _HOST = os.getenv('POSTGRE_HOST')
-    _DB_PORT = os.getenv('POSTGRE_PORT')
-    _DATABASE = os.getenv('POSTGRE_DB')
+    # Configuración leída de las variables de entorno (y del .env) en configurar(),
+    # la primera vez que se pide el pool, no al importar el módulo.
+    # Tamaño y modo del pool: 'simple' (SimpleConnectionPool, un solo hilo)
+    # o 'bloqueante' (thread-safe, getconn espera hasta _POOL_TIMEOUT segundos).
+    # Salud de las conexiones del pool bloqueante en segundos (0 desactiva).
+    # Backend (DB_BACKEND): 'postgres', 'sqlite' (fichero DB_SQLITE_RUTA) o 'memoria'
+    # (SQLite en memoria compartida por el pool); los dos últimos no necesitan
+    # servidor y crean las tablas al crear el pool. Solo Postgres usa PREPARE.
+    # Réplicas de solo lectura (POSTGRE_REPLICA_HOSTS=host1:puerto,host2): cada una
+    # con su propio pool; las lecturas se reparten por turnos ('rotacion') o a la
+    # menos ocupada ('menos_ocupada'). Una réplica llena se salta sin esperar, una
+    # que falla se aparta durante _REPLICA_REINTENTO segundos y, si no queda
+    # ninguna, se lee de la primaria.
+    _BACKEND = 'postgres'
+    _SQLITE_RUTA = 'datos.sqlite3'
+    _PREPARAR = True
+    _USERNAME = None
+    _PASSWORD = None
+    _HOST = None
+    _DB_PORT = None
+    _DATABASE = None
     _MIN_CON = 1
-    _MAX_CON =5
+    _MAX_CON = 5
+    _POOL_MODO = 'simple'
+    _POOL_TIMEOUT = 30
+    _MAX_VIDA = 1800
+    _MAX_INACTIVIDAD = 600
+    _INTERVALO_VALIDACION = 30
+    _INTERVALO_MANTENIMIENTO = 60
+    _REPLICAS = ()
+    _BALANCEO = 'rotacion'
+    _REPLICA_REINTENTO = 30
+    _configurada = False
+    _lock_pool = threading.Lock()
     _conexion = None
     _cursor = None
     _pool = None
+    _conexion_memoria = None
+    _pools_replica = []
+    _caida_hasta = []
+    _turno = count()
+    # Pool del que salió cada conexión entregada, para devolverla al mismo
+    _origen = {}
+    # Sentencias preparadas (PREPARE) de cada conexión física. Al ser un registro
+    # débil, una conexión reciclada por el pool desaparece de él y la nueva
+    # vuelve a preparar sus sentencias la primera vez que las usa.
+    _preparadas = weakref.WeakKeyDictionary()
+    _lock_preparadas = threading.Lock()
+
+    @classmethod
+    def configurar(cls):
+        if cls._configurada:
+            return
+        from dotenv import load_dotenv  # para importar las varaibles del .env
+        # Cargar las variables de entorno desde el archivo .env
+        load_dotenv()
+        cls._BACKEND = os.getenv('DB_BACKEND', cls._BACKEND)
+        if cls._BACKEND not in ('postgres', 'sqlite', 'memoria'):
+            raise ValueError(f'DB_BACKEND desconocido: {cls._BACKEND}')
+        cls._PREPARAR = cls._BACKEND == 'postgres'
+        cls._SQLITE_RUTA = os.getenv('DB_SQLITE_RUTA', cls._SQLITE_RUTA)
+        cls._USERNAME = os.getenv('POSTGRE_USER')
+        cls._PASSWORD = os.getenv('POSTGRE_PASSWORD')
+        cls._HOST = os.getenv('POSTGRE_HOST')
+        cls._DB_PORT = os.getenv('POSTGRE_PORT')
+        cls._DATABASE = os.getenv('POSTGRE_DB')
+        cls._MIN_CON = int(os.getenv('POSTGRE_MIN_CON', cls._MIN_CON))
+        cls._MAX_CON = int(os.getenv('POSTGRE_MAX_CON', cls._MAX_CON))
+        cls._POOL_MODO = os.getenv('POSTGRE_POOL_MODO', cls._POOL_MODO)
+        cls._POOL_TIMEOUT = float(os.getenv('POSTGRE_POOL_TIMEOUT', cls._POOL_TIMEOUT))
+        cls._MAX_VIDA = float(os.getenv('POSTGRE_POOL_MAX_VIDA', cls._MAX_VIDA))
+        cls._MAX_INACTIVIDAD = float(os.getenv('POSTGRE_POOL_MAX_INACTIVIDAD', cls._MAX_INACTIVIDAD))
+        cls._INTERVALO_VALIDACION = float(os.getenv('POSTGRE_POOL_INTERVALO_VALIDACION', cls._INTERVALO_VALIDACION))
+        cls._INTERVALO_MANTENIMIENTO = float(os.getenv('POSTGRE_POOL_INTERVALO_MANTENIMIENTO',
+                                                       cls._INTERVALO_MANTENIMIENTO))
+        # Las réplicas solo tienen sentido con Postgres
+        replicas = [] if cls._BACKEND != 'postgres' else [host.strip() for host in os.getenv('POSTGRE_REPLICA_HOSTS', '').split(',')
+                                                          if host.strip()]
+        cls._REPLICAS = [tuple(host.split(':', 1)) if ':' in host else (host, cls._DB_PORT) for host in replicas]
+        cls._BALANCEO = os.getenv('POSTGRE_REPLICA_BALANCEO', cls._BALANCEO)
+        cls._REPLICA_REINTENTO = float(os.getenv('POSTGRE_REPLICA_REINTENTO', cls._REPLICA_REINTENTO))
+        cls._pools_replica = [None] * len(cls._REPLICAS)
+        cls._caida_hasta = [0.0] * len(cls._REPLICAS)
+        cls._configurada = True
 
     @classmethod
     def obtenerPool(cls):
-        if cls._pool is None:
-            try:
-                cls._pool = pool.SimpleConnectionPool(cls._MIN_CON, cls._MAX_CON,
-                                                      host=cls._HOST,
-                                                      user=cls._USERNAME,
-                                                      password=cls._PASSWORD,
-                                                      port=cls._DB_PORT,
-                                                      database=cls._DATABASE)
-                log.debug(f'Creación del pool exitosa: {cls._pool}')
+        if cls._pool is not None:
+            return cls._pool
+        with cls._lock_pool:
+            if cls._pool is not None:
                 return cls._pool
+            cls.configurar()
+            try:
+                if cls._BACKEND == 'postgres':
+                    cls._pool = cls._crearPool(cls._HOST, cls._DB_PORT)
+                else:
+                    cls._pool = cls._crearPoolSQLite()
             except Exception as e:
-                log.error(f'Ocurrió un error al obtener el pool {e}')
-                sys.exit()
-        else:
+                # Se propaga el error: decide quien llama, no se termina el proceso
+                log.error('Ocurrió un error al obtener el pool %s', e)
+                raise
+            log.debug('Creación del pool exitosa: %s', cls._pool)
             return cls._pool
 
     @classmethod
-    def obtenerConexion(cls):
-        conexion = cls.obtenerPool().getconn()
-        log.debug(f'Conexión obtenida del pool: {conexion}')
+    def _crearPoolSQLite(cls):
+        import backend_sqlite
+        ruta = backend_sqlite.ruta_memoria() if cls._BACKEND == 'memoria' else cls._SQLITE_RUTA
+        conexion = backend_sqlite.conectar(ruta)
+        backend_sqlite.crear_esquema(conexion)
+        if cls._BACKEND == 'memoria':
+            # Esta conexión mantiene viva la base en memoria aunque el pool cierre las suyas
+            cls._conexion_memoria = conexion
+        else:
+            conexion.close()
+        # sqlite3 no trae pool: siempre se usa el bloqueante, que es thread-safe
+        return PoolBloqueante(cls._MIN_CON, cls._MAX_CON, partial(backend_sqlite.conectar, ruta, cls._POOL_TIMEOUT),
+                              timeout=cls._POOL_TIMEOUT,
+                              intervalo_validacion=cls._INTERVALO_VALIDACION or None)
+
+    @classmethod
+    def _crearPool(cls, host, puerto):
+        if cls._POOL_MODO == 'bloqueante':
+            return PoolBloqueante(cls._MIN_CON, cls._MAX_CON, partial(cls._nuevaConexion, host, puerto),
+                                  timeout=cls._POOL_TIMEOUT,
+                                  max_vida=cls._MAX_VIDA or None,
+                                  max_inactividad=cls._MAX_INACTIVIDAD or None,
+                                  intervalo_validacion=cls._INTERVALO_VALIDACION or None,
+                                  intervalo_mantenimiento=cls._INTERVALO_MANTENIMIENTO or None)
+        from psycopg2 import pool
+        return pool.SimpleConnectionPool(cls._MIN_CON, cls._MAX_CON,
+                                         host=host,
+                                         user=cls._USERNAME,
+                                         password=cls._PASSWORD,
+                                         port=puerto,
+                                         database=cls._DATABASE)
+
+    @classmethod
+    def _nuevaConexion(cls, host=None, puerto=None):
+        import psycopg2
+        return psycopg2.connect(host=host or cls._HOST,
+                                user=cls._USERNAME,
+                                password=cls._PASSWORD,
+                                port=puerto or cls._DB_PORT,
+                                database=cls._DATABASE)
+
+    @classmethod
+    def _poolReplica(cls, indice):
+        pool = cls._pools_replica[indice]
+        if pool is None:
+            with cls._lock_pool:
+                pool = cls._pools_replica[indice]
+                if pool is None:
+                    pool = cls._pools_replica[indice] = cls._crearPool(*cls._REPLICAS[indice])
+                    log.debug('Creación del pool de la réplica %s exitosa: %s', cls._REPLICAS[indice], pool)
+        return pool
+
+    @classmethod
+    def _obtenerConexionReplica(cls):
+        '''Conexión de alguna réplica disponible, o None si ninguna la da'''
+        total = len(cls._REPLICAS)
+        if cls._BALANCEO == 'menos_ocupada':
+            orden = sorted(range(total), key=lambda indice: cls._enUso(cls._pools_replica[indice]))
+        else:
+            primera = next(cls._turno) % total
+            orden = [(primera + i) % total for i in range(total)]
+        for indice in orden:
+            ahora = time.monotonic()
+            if cls._caida_hasta[indice] > ahora:
+                continue
+            try:
+                pool = cls._poolReplica(indice)
+                # Sin esperar a que se libere una conexión: si está llena se pasa a la siguiente
+                conexion = pool.getconn(timeout=0) if isinstance(pool, PoolBloqueante) else pool.getconn()
+            except Exception as e:
+                if cls._agotado(e):
+                    # Réplica ocupada pero sana: se prueba con la siguiente
+                    continue
+                cls._caida_hasta[indice] = ahora + cls._REPLICA_REINTENTO
+                log.warning('Réplica %s no disponible, se aparta %ss: %s', cls._REPLICAS[indice],
+                            cls._REPLICA_REINTENTO, e)
+                continue
+            cls._origen[id(conexion)] = pool
+            return conexion
+        return None
+
+    @classmethod
+    def obtenerConexion(cls, solo_lectura=False):
+        '''solo_lectura=True la pide a una réplica si hay configuradas (con vuelta a la primaria)'''
+        inicio = time.perf_counter()
+        try:
+            conexion = None
+            if solo_lectura:
+                cls.configurar()
+                if cls._REPLICAS:
+                    conexion = cls._obtenerConexionReplica()
+            destino = 'primaria' if conexion is None else 'replica'
+            if conexion is None:
+                conexion = cls.obtenerPool().getconn()
+        except Exception:
+            _ERRORES_CONEXION.inc()
+            raise
+        _ESPERA_CONEXION.observar(time.perf_counter() - inicio)
+        _DESTINOS[destino].inc()
+        log.debug('Conexión obtenida del pool (%s): %s', destino, conexion)
         return conexion
 
     @classmethod
-    def liberarConexion(cls, conexion):
-        cls.obtenerPool().putconn(conexion)
-        log.debug(f'Regresamos la conexión al pool: {conexion}')
+    def liberarConexion(cls, conexion, descartar=False):
+        # descartar=True cierra la conexión (p.ej. rota) en lugar de devolverla a las libres
+        pool = cls._origen.pop(id(conexion), None) or cls.obtenerPool()
+        pool.putconn(conexion, close=descartar)
+        if descartar:
+            log.debug('Conexión descartada del pool: %s', conexion)
+        else:
+            log.debug('Regresamos la conexión al pool: %s', conexion)
+
+    @staticmethod
+    def _agotado(error):
+        '''Pool lleno pero sano: PoolAgotadoError del bloqueante o PoolError de psycopg2'''
+        if isinstance(error, PoolAgotadoError):
+            return True
+        # Si psycopg2.pool no está cargado el error no puede venir de él
+        pool = sys.modules.get('psycopg2.pool')
+        return pool is not None and isinstance(error, pool.PoolError) and 'exhausted' in str(error)
+
+    @staticmethod
+    def _enUso(pool):
+        if pool is None:
+            return 0
+        if isinstance(pool, PoolBloqueante):
+            return pool.en_uso
+        return len(pool._used)
+
+    @classmethod
+    def estadoPool(cls):
+        pool = cls._pool
+        if pool is None:
+            return {'en_uso': 0, 'libres': 0, 'esperando': 0}
+        if isinstance(pool, PoolBloqueante):
+            return {'en_uso': pool.en_uso, 'libres': pool.libres, 'esperando': pool.esperando}
+        return {'en_uso': len(pool._used), 'libres': len(pool._pool), 'esperando': 0}
+
+    @classmethod
+    def sentenciasPreparadas(cls, conexion):
+        with cls._lock_preparadas:
+            return cls._preparadas.setdefault(conexion, set())
 
     @classmethod
     def cerrarConexiones(cls):
+        for pool in cls._pools_replica:
+            if pool is not None:
+                pool.closeall()
         cls.obtenerPool().closeall()
+        if cls._conexion_memoria is not None:
+            cls._conexion_memoria.close()
+            cls._conexion_memoria = None
+
+for _estado in ('en_uso', 'libres', 'esperando'):
+    REGISTRO.medidor('db_pool_conexiones', 'Conexiones del pool por estado', {'estado': _estado},
+                     funcion=lambda estado=_estado: Conexion.estadoPool()[estado])
+REGISTRO.medidor('db_pool_utilizacion', 'Fracción de conexiones del pool en uso',
+                 funcion=lambda: Conexion.estadoPool()['en_uso'] / Conexion._MAX_CON)
 
 if __name__ == '__main__':
     conexion1 = Conexion.obtenerConexion()
@@ -63,3 +291,9 @@ if __name__ == '__main__':
     conexion5 = Conexion.obtenerConexion()
     Conexion.liberarConexion(conexion5)
     conexion6 = Conexion.obtenerConexion()
+
+    # Lecturas repartidas entre las réplicas de POSTGRE_REPLICA_HOSTS
+    lecturas = [Conexion.obtenerConexion(solo_lectura=True) for _ in range(3)]
+    for lectura in lecturas:
+        log.debug('Lectura servida por %s', lectura.info.host)
+        Conexion.liberarConexion(lectura)
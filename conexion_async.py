@@ -0,0 +1,72 @@
+import asyncio
+
+from conexion import Conexion
+from logger_base import log
+
+# Para psycopg_pool max_lifetime=0 caduca cada conexión al devolverla y max_idle=0
+# deja ShrinkPool en bucle. En Conexion un 0 desactiva el límite: aquí se traduce
+# a un año, igual que `or None` en el pool síncrono.
+_SIN_LIMITE = 365 * 24 * 3600
+
+class ConexionAsync:
+    '''
+    Equivalente asíncrono de Conexion sobre psycopg 3 (psycopg_pool): misma
+    configuración (Conexion.configurar), pero las esperas por conexión no
+    bloquean el event loop
+    '''
+    _pool = None
+    _lock = None
+
+    @classmethod
+    async def obtenerPool(cls):
+        if cls._pool is None:
+            if cls._lock is None:
+                cls._lock = asyncio.Lock()
+            async with cls._lock:
+                if cls._pool is None:
+                    from psycopg_pool import AsyncConnectionPool
+                    Conexion.configurar()
+                    pool = AsyncConnectionPool(kwargs={'host': Conexion._HOST,
+                                                       'user': Conexion._USERNAME,
+                                                       'password': Conexion._PASSWORD,
+                                                       'port': Conexion._DB_PORT,
+                                                       'dbname': Conexion._DATABASE},
+                                               min_size=Conexion._MIN_CON,
+                                               max_size=Conexion._MAX_CON,
+                                               timeout=Conexion._POOL_TIMEOUT,
+                                               max_lifetime=Conexion._MAX_VIDA or _SIN_LIMITE,
+                                               max_idle=Conexion._MAX_INACTIVIDAD or _SIN_LIMITE,
+                                               check=AsyncConnectionPool.check_connection,
+                                               open=False)
+                    await pool.open()
+                    cls._pool = pool
+                    log.debug('Creación del pool asíncrono exitosa: %s', cls._pool)
+        return cls._pool
+
+    @classmethod
+    async def obtenerConexion(cls):
+        pool = await cls.obtenerPool()
+        conexion = await pool.getconn()
+        log.debug('Conexión asíncrona obtenida del pool: %s', conexion)
+        return conexion
+
+    @classmethod
+    async def liberarConexion(cls, conexion):
+        pool = await cls.obtenerPool()
+        await pool.putconn(conexion)
+        log.debug('Regresamos la conexión asíncrona al pool: %s', conexion)
+
+    @classmethod
+    async def cerrarConexiones(cls):
+        if cls._pool is not None:
+            await cls._pool.close()
+            cls._pool = None
+
+if __name__ == '__main__':
+    async def main():
+        conexiones = await asyncio.gather(*(ConexionAsync.obtenerConexion() for _ in range(3)))
+        for conexion in conexiones:
+            await ConexionAsync.liberarConexion(conexion)
+        await ConexionAsync.cerrarConexiones()
+
+    asyncio.run(main())
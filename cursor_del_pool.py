@@ -1,30 +1,296 @@
+import os
+import time
+from contextvars import ContextVar
+from itertools import count
+
 from logger_base import log
 from conexion import Conexion
+from metricas import REGISTRO
+
+_COMMIT = REGISTRO.histograma('db_commit_segundos', 'Duración de los commit')
+_ROLLBACK = REGISTRO.histograma('db_rollback_segundos', 'Duración de los rollback')
+_TRANSACCIONES = {resultado: REGISTRO.contador('db_transacciones_total', 'Transacciones por resultado',
+                                               {'resultado': resultado})
+                  for resultado in ('commit', 'rollback')}
+# Unidad de trabajo activa en el hilo/tarea actual (ver UnidadDeTrabajo)
+_UNIDAD = ContextVar('unidad_de_trabajo', default=None)
+# Las transacciones más lentas que este umbral (LOG_UMBRAL_LENTA_MS) se registran
+# como WARNING. Se lee en el primer uso, con el .env ya cargado por Conexion.configurar()
+_umbral_lenta_ms = None
+
+
+def _terminar_transaccion(conexion, valor_excepcion):
+    '''
+    Commit si no hubo excepción, rollback en otro caso. Devuelve (resultado, rota,
+    error_commit): rota indica que la conexión no sirve y hay que descartarla.
+    '''
+    error_commit = None
+    if isinstance(valor_excepcion, GeneratorExit):
+        # Un generador que se abandona a medias no es un error
+        log.debug('Iteración interrumpida, se hace rollback')
+    elif valor_excepcion:
+        log.error('Ocurrió una excepción, se hace rollback: %s %s', valor_excepcion, type(valor_excepcion))
+    else:
+        inicio = time.perf_counter()
+        try:
+            conexion.commit()
+            _COMMIT.observar(time.perf_counter() - inicio)
+            log.debug('Commit de la transacción')
+        except Exception as e:
+            # p.ej. un conflicto de serialización detectado al confirmar
+            log.error('Falló el commit, se hace rollback: %s', e)
+            error_commit = e
+    resultado = 'rollback' if valor_excepcion or error_commit else 'commit'
+    rota = resultado == 'rollback' and not _deshacer(conexion)
+    _TRANSACCIONES[resultado].inc()
+    return resultado, rota, error_commit
+
+
+def _registrar_transaccion(resultado, inicio, espera, ejecucion, filas):
+    '''
+    Registro por transacción con los tiempos en `datos` (para el formato JSON):
+    DEBUG, o WARNING si supera el umbral. Se llama desde el __exit__ de
+    CursorDelPool o de UnidadDeTrabajo, así stacklevel=3 apunta a la línea que abrió el with.
+    '''
+    global _umbral_lenta_ms
+    if _umbral_lenta_ms is None:
+        _umbral_lenta_ms = float(os.getenv('LOG_UMBRAL_LENTA_MS', 500))
+    total_ms = (time.perf_counter() - inicio + espera) * 1000
+    nivel = log.WARNING if total_ms > _umbral_lenta_ms else log.DEBUG
+    if not log.getLogger().isEnabledFor(nivel):
+        return
+    datos = {'resultado': resultado,
+             'espera_pool_ms': round(espera * 1000, 3),
+             'ejecucion_ms': round(ejecucion * 1000, 3),
+             'total_ms': round(total_ms, 3),
+             'filas': filas}
+    log.log(nivel, 'Transacción %s: espera %.3f ms, ejecución %.3f ms, filas %s',
+            resultado, datos['espera_pool_ms'], datos['ejecucion_ms'], filas,
+            extra={'datos': datos}, stacklevel=3)
+
+
+def _deshacer(conexion):
+    '''Hace rollback; devuelve False si la conexión está rota y hay que descartarla'''
+    if conexion.closed:
+        return False
+    inicio = time.perf_counter()
+    try:
+        conexion.rollback()
+    except Exception as e:
+        log.warning('Falló el rollback, se descarta la conexión: %s', e)
+        return False
+    _ROLLBACK.observar(time.perf_counter() - inicio)
+    return True
+
+
+class _CursorMedido:
+    '''Envuelve el cursor del pool para medir cada execute por sentencia SQL'''
+    __slots__ = ('cursor_real',)
+
+    def __init__(self, cursor):
+        object.__setattr__(self, 'cursor_real', cursor)
+
+    def execute(self, sql, *args):
+        inicio = time.perf_counter()
+        try:
+            return self.cursor_real.execute(sql, *args)
+        finally:
+            # Las sentencias ya compuestas (bytes) se agrupan en una única serie
+            REGISTRO.observar_sql(sql if isinstance(sql, str) else 'sql_compuesta', time.perf_counter() - inicio)
+
+    def __iter__(self):
+        return iter(self.cursor_real)
+
+    def __getattr__(self, nombre):
+        return getattr(self.cursor_real, nombre)
+
+    def __setattr__(self, nombre, valor):
+        setattr(self.cursor_real, nombre, valor)
+
 
 class CursorDelPool:
-    def __init__(self):
+    # Contador para dar nombres únicos a los cursores del lado del servidor
+    _secuencia = count(1)
+
+    def __init__(self, servidor=False, itersize=None, solo_lectura=False):
+        '''
+        servidor=True abre un cursor con nombre (server-side): las filas se traen
+        en bloques de itersize al iterar el cursor en lugar de todas de golpe.
+        solo_lectura=True permite servir la consulta desde una réplica.
+        '''
+        self._servidor = servidor
+        self._solo_lectura = solo_lectura
+        self._itersize = itersize
         self._conexion = None
         self._cursor = None
+        self._unidad = None
+        self._espera = 0.0
+        self._inicio = 0.0
 
     def __enter__(self):
         log.debug('Incio del método with __enter__')
-        self._conexion = Conexion.obtenerConexion()
-        self._cursor = self._conexion.cursor()
-        return self._cursor
+        self._unidad = _UNIDAD.get()
+        inicio = time.perf_counter()
+        if self._unidad is not None:
+            # Dentro de una unidad de trabajo se comparte su conexión y su transacción
+            self._conexion = self._unidad.conexion
+        else:
+            self._conexion = Conexion.obtenerConexion(self._solo_lectura)
+        self._inicio = time.perf_counter()
+        self._espera = self._inicio - inicio
+        if self._servidor:
+            self._cursor = self._conexion.cursor(name=f'cursor_servidor_{next(self._secuencia)}')
+            if self._itersize:
+                self._cursor.itersize = self._itersize
+        else:
+            self._cursor = self._conexion.cursor()
+        return _CursorMedido(self._cursor)
 
     def __exit__(self, tipo_excepcion, valor_excepcion, detalle_excepcion):
         log.debug('Se ejecuta método __exit__')
-        if valor_excepcion:
-            self._conexion.rollback()
-            log.error(f'Ocurrió una excepción, se hace rollback: {valor_excepcion} {tipo_excepcion} {detalle_excepcion}')
+        if self._unidad is not None:
+            # El commit o rollback lo hace la unidad de trabajo al terminar
+            self._unidad.filas += max(self._cursor.rowcount, 0)
+            if not self._conexion.closed:
+                self._cursor.close()
+            return
+        ejecucion = time.perf_counter() - self._inicio
+        filas = self._cursor.rowcount
+        # Si algo falla antes de saber el estado de la conexión, se descarta
+        rota = True
+        try:
+            if self._servidor and not self._conexion.closed:
+                # Un cursor con nombre deja de existir con su transacción: se cierra antes del commit
+                self._cursor.close()
+            resultado, rota, error_commit = _terminar_transaccion(self._conexion, valor_excepcion)
+            if not (rota or self._servidor):
+                self._cursor.close()
+        finally:
+            # Una conexión rota no vuelve al pool: se cierra y su hueco queda libre
+            Conexion.liberarConexion(self._conexion, descartar=rota)
+        _registrar_transaccion(resultado, self._inicio, self._espera, ejecucion, filas)
+        if error_commit is not None:
+            raise error_commit
+
+    @staticmethod
+    def ejecutar_preparada(cursor, nombre, sql, valores=()):
+        '''
+        Ejecuta `sql` como sentencia preparada: la primera vez que se usa en la
+        conexión se hace PREPARE y a partir de ahí solo EXECUTE por nombre. Con
+        SQLite se ejecuta tal cual: sqlite3 ya guarda las sentencias compiladas.
+        '''
+        if not Conexion._PREPARAR:
+            cursor.execute(sql, valores)
+            return
+        preparadas = Conexion.sentenciasPreparadas(cursor.connection)
+        if nombre not in preparadas:
+            partes = sql.split('%s')
+            sql_posicional = partes[0] + ''.join(f'${i}{parte}' for i, parte in enumerate(partes[1:], 1))
+            cursor.execute(f'PREPARE {nombre} AS {sql_posicional}')
+            preparadas.add(nombre)
+            log.debug('Sentencia preparada %s: %s', nombre, sql_posicional)
+        if valores:
+            cursor.execute(f'EXECUTE {nombre} ({", ".join(["%s"] * len(valores))})', valores)
         else:
-            self._conexion.commit()
-            log.debug('Commit de la transacción')
-        self._cursor.close()
-        Conexion.liberarConexion(self._conexion)
+            cursor.execute(f'EXECUTE {nombre}')
+
+
+class UnidadDeTrabajo:
+    '''
+    Agrupa varias operaciones de los DAO en una sola transacción: dentro del with,
+    cada CursorDelPool usa la misma conexión y no hace commit; al salir se hace un
+    único commit (o rollback si hubo excepción). Anidar otra UnidadDeTrabajo crea
+    un SAVEPOINT, así un fallo interno se deshace sin perder el resto.
+    '''
+    _secuencia = count(1)
+
+    def __init__(self):
+        self.conexion = None
+        self._padre = None
+        self._savepoint = None
+        self._token = None
+        self._al_confirmar = []
+        self._espera = 0.0
+        self._inicio = 0.0
+        # Filas afectadas por los cursores de la unidad, para su registro de transacción
+        self.filas = 0
+
+    @staticmethod
+    def activa():
+        return _UNIDAD.get() is not None
+
+    @staticmethod
+    def al_confirmar(funcion, *args):
+        '''Ejecuta funcion(*args) tras el commit de la unidad activa, o en el momento si no hay ninguna'''
+        unidad = _UNIDAD.get()
+        if unidad is None:
+            funcion(*args)
+        else:
+            unidad._al_confirmar.append((funcion, args))
+
+    def __enter__(self):
+        self._padre = _UNIDAD.get()
+        if self._padre is None:
+            inicio = time.perf_counter()
+            self.conexion = Conexion.obtenerConexion()
+            self._inicio = time.perf_counter()
+            self._espera = self._inicio - inicio
+        else:
+            self.conexion = self._padre.conexion
+            self._savepoint = f'unidad_{next(self._secuencia)}'
+            self._ejecutar(f'SAVEPOINT {self._savepoint}')
+        self._token = _UNIDAD.set(self)
+        return self
+
+    def __exit__(self, tipo_excepcion, valor_excepcion, detalle_excepcion):
+        _UNIDAD.reset(self._token)
+        if self._padre is not None:
+            if valor_excepcion is None:
+                # Las filas de un savepoint deshecho no cuentan en la unidad exterior
+                self._padre.filas += self.filas
+            self._cerrar_savepoint(valor_excepcion)
+            return
+        ejecucion = time.perf_counter() - self._inicio
+        resultado, rota, error_commit = _terminar_transaccion(self.conexion, valor_excepcion)
+        Conexion.liberarConexion(self.conexion, descartar=rota)
+        log.debug('Unidad de trabajo terminada con %s', resultado)
+        _registrar_transaccion(resultado, self._inicio, self._espera, ejecucion, self.filas)
+        if error_commit is not None:
+            raise error_commit
+        if resultado == 'commit':
+            for funcion, args in self._al_confirmar:
+                try:
+                    funcion(*args)
+                except Exception as e:
+                    log.error('Error tras el commit de la unidad de trabajo en %s: %s', funcion, e)
+
+    def _cerrar_savepoint(self, valor_excepcion):
+        if valor_excepcion is None:
+            self._ejecutar(f'RELEASE SAVEPOINT {self._savepoint}')
+            # Lo pendiente pasa a la unidad exterior y se ejecuta con su commit
+            self._padre._al_confirmar.extend(self._al_confirmar)
+        elif not self.conexion.closed:
+            self._ejecutar(f'ROLLBACK TO SAVEPOINT {self._savepoint}')
+            log.debug('Rollback hasta el savepoint %s: %s', self._savepoint, valor_excepcion)
+
+    def _ejecutar(self, sql):
+        with self.conexion.cursor() as cursor:
+            cursor.execute(sql)
 
 if __name__ == '__main__':
     with CursorDelPool() as cursor:
         log.debug('Dentro del bloque with')
         cursor.execute('SELECT * FROM persona')
-        log.debug(cursor.fetchall())
\ No newline at end of file
+        log.debug(cursor.fetchall())
+
+    # Dos escrituras con un solo commit; la segunda se deshace hasta su savepoint
+    with UnidadDeTrabajo():
+        with CursorDelPool() as cursor:
+            cursor.execute('UPDATE persona SET email=lower(email)')
+        try:
+            with UnidadDeTrabajo():
+                with CursorDelPool() as cursor:
+                    cursor.execute('DELETE FROM persona WHERE id_persona=%s', (1,))
+                raise ValueError('Se deshace solo el borrado')
+        except ValueError as e:
+            log.debug(e)
\ No newline at end of file
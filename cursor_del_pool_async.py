@@ -0,0 +1,55 @@
+import asyncio
+from itertools import count
+
+from logger_base import log
+from conexion_async import ConexionAsync
+
+class CursorDelPoolAsync:
+    '''
+    Versión `async with` de CursorDelPool: commit si el bloque termina bien,
+    rollback si hay excepción y la conexión siempre vuelve al pool
+    '''
+    _secuencia = count(1)
+
+    def __init__(self, servidor=False, itersize=None):
+        self._servidor = servidor
+        self._itersize = itersize
+        self._conexion = None
+        self._cursor = None
+
+    async def __aenter__(self):
+        log.debug('Incio del método async with __aenter__')
+        self._conexion = await ConexionAsync.obtenerConexion()
+        if self._servidor:
+            self._cursor = self._conexion.cursor(name=f'cursor_servidor_{next(self._secuencia)}')
+            if self._itersize:
+                self._cursor.itersize = self._itersize
+        else:
+            self._cursor = self._conexion.cursor()
+        return self._cursor
+
+    async def __aexit__(self, tipo_excepcion, valor_excepcion, detalle_excepcion):
+        log.debug('Se ejecuta método __aexit__')
+        try:
+            if isinstance(valor_excepcion, (GeneratorExit, asyncio.CancelledError)):
+                await self._conexion.rollback()
+                log.debug('Iteración interrumpida o tarea cancelada, se hace rollback')
+            elif valor_excepcion:
+                await self._conexion.rollback()
+                log.error('Ocurrió una excepción, se hace rollback: %s %s %s', valor_excepcion, tipo_excepcion, detalle_excepcion)
+            else:
+                await self._conexion.commit()
+                log.debug('Commit de la transacción')
+            await self._cursor.close()
+        finally:
+            await ConexionAsync.liberarConexion(self._conexion)
+
+if __name__ == '__main__':
+    async def main():
+        async with CursorDelPoolAsync() as cursor:
+            log.debug('Dentro del bloque async with')
+            await cursor.execute('SELECT * FROM persona')
+            log.debug(await cursor.fetchall())
+        await ConexionAsync.cerrarConexiones()
+
+    asyncio.run(main())
@@ -1,6 +1,10 @@
+from itertools import starmap
+
 from logger_base import log
 
 class Persona:
+    # Sin __dict__ por instancia: cada persona solo reserva sus cuatro atributos
+    __slots__ = ('_id_persona', '_nombre', '_apellido', '_email')
 
     def __init__(self, id_persona = None, nombre = None, apellido = None, email = None):
         self._id_persona = id_persona
@@ -16,6 +20,11 @@ class Persona:
              Email: {self._email}
         '''
 
+    @classmethod
+    def desde_registros(cls, registros):
+        '''Convierte filas (id_persona, nombre, apellido, email) en personas de una pasada'''
+        return list(starmap(cls, registros))
+
     # get/set id_persona
     @property
     def id_persona(self):
@@ -1,7 +1,11 @@
+from itertools import starmap
+
 from conexion import Conexion
-from cursor_del_pool import CursorDelPool
+from cursor_del_pool import CursorDelPool, UnidadDeTrabajo
 from persona import Persona
-from logger_base import log
+from logger_base import log, Perezoso
+from cache_entidades import CacheLRU
+from utilidades_dao import dividir_en_lotes, ejecutar_valores, importar_numpy, leer_columnas
 
 class PersonaDAO:
     '''
@@ -12,41 +16,209 @@ class PersonaDAO:
     _INSERTAR = 'INSERT INTO persona(nombre, apellido, email) VALUES(%s, %s, %s)'
     _ACTUALIZAR = 'UPDATE persona SET nombre=%s, apellido=%s, email=%s WHERE id_persona=%s'
     _ELIMINAR = 'DELETE FROM persona WHERE id_persona=%s'
+    # Los listados y recorridos pueden leerse de una réplica (solo_lectura=True); las
+    # búsquedas por clave van a la primaria para ver las escrituras recién confirmadas
+    _ITERSIZE = 2000
+    _COLUMNAS = ('id_persona', 'nombre', 'apellido', 'email')
+    _SELECCIONAR_COLUMNAS = 'SELECT id_persona, nombre, apellido, email FROM persona ORDER BY id_persona'
+    # Paginación por clave (keyset) y búsquedas: coste proporcional a la página, no a la tabla.
+    # id_persona usa el índice de la clave primaria; la búsqueda por email necesita _INDICES.
+    _SELECCIONAR_PAGINA = ('SELECT id_persona, nombre, apellido, email FROM persona '
+                           'WHERE id_persona > %s ORDER BY id_persona LIMIT %s')
+    _SELECCIONAR_POR_ID = 'SELECT id_persona, nombre, apellido, email FROM persona WHERE id_persona=%s'
+    _SELECCIONAR_POR_EMAIL = ('SELECT id_persona, nombre, apellido, email FROM persona '
+                              'WHERE email=%s ORDER BY id_persona LIMIT 1')
+    _INDICES = ('CREATE INDEX IF NOT EXISTS persona_email_idx ON persona (email)',)
+    _TAMANO_PAGINA = 50
+    # Caché opcional de personas por id_persona (ver activar_cache)
+    _cache = None
+    # Operaciones por lotes: una sentencia multi-fila y una transacción por lote
+    _TAMANO_LOTE = 1000
+    _INSERTAR_LOTE = 'INSERT INTO persona(nombre, apellido, email) VALUES %s RETURNING id_persona'
+    _ACTUALIZAR_LOTE = ('WITH v(id_persona, nombre, apellido, email) AS (VALUES %s) '
+                        'UPDATE persona SET nombre=v.nombre, apellido=v.apellido, email=v.email '
+                        'FROM v WHERE persona.id_persona=v.id_persona')
+    _ELIMINAR_LOTE = 'DELETE FROM persona WHERE id_persona IN (VALUES %s)'
 
     @classmethod
     def seleccionar(cls):
-        with CursorDelPool() as cursor:
+        with CursorDelPool(solo_lectura=True) as cursor:
+            cursor.execute(cls._SELECCIONAR)
+            return Persona.desde_registros(cursor.fetchall())
+
+    @classmethod
+    def iterar(cls, itersize=None):
+        '''
+        Generador de personas: usa un cursor del lado del servidor y solo mantiene
+        en memoria un bloque de itersize filas. La conexión se devuelve al pool
+        al agotar o cerrar el generador.
+        '''
+        with CursorDelPool(servidor=True, itersize=itersize or cls._ITERSIZE, solo_lectura=True) as cursor:
             cursor.execute(cls._SELECCIONAR)
-            registros = cursor.fetchall()
-            personas = []
-            for registro in registros:
-                persona = Persona(registro[0], registro[1], registro[2], registro[3])
-                personas.append(persona)
-            return personas
+            yield from starmap(Persona, cursor)
+
+    @classmethod
+    def seleccionar_columnas(cls, tamano_bloque=None):
+        '''
+        Modo columnar para análisis: {'id_persona': int64, 'nombre': ..., ...} como
+        arrays de NumPy, leídos por bloques de un cursor del lado del servidor
+        '''
+        # Sin NumPy se falla antes de ocupar una conexión y lanzar la consulta
+        importar_numpy()
+        tamano_bloque = tamano_bloque or cls._ITERSIZE
+        with CursorDelPool(servidor=True, itersize=tamano_bloque, solo_lectura=True) as cursor:
+            cursor.execute(cls._SELECCIONAR_COLUMNAS)
+            return leer_columnas(cursor, cls._COLUMNAS, numericas=('id_persona',), tamano_bloque=tamano_bloque)
+
+    @classmethod
+    def seleccionar_pagina(cls, after_id=0, limit=None):
+        '''
+        Devuelve como mucho `limit` personas con id_persona > after_id. Para pedir
+        la siguiente página se pasa el id_persona de la última persona recibida.
+        '''
+        with CursorDelPool(solo_lectura=True) as cursor:
+            cursor.execute(cls._SELECCIONAR_PAGINA, (after_id, limit or cls._TAMANO_PAGINA))
+            return Persona.desde_registros(cursor.fetchall())
+
+    @classmethod
+    def activar_cache(cls, max_entradas=1024, ttl=60):
+        '''
+        Activa una caché LRU con caducidad para seleccionar_por_id. Las escrituras
+        hechas a través del DAO la refrescan o invalidan tras el commit.
+        '''
+        cls._cache = CacheLRU(max_entradas, ttl)
+        return cls._cache
+
+    @classmethod
+    def desactivar_cache(cls):
+        cls._cache = None
+
+    @classmethod
+    def _invalidar_cache(cls, personas):
+        if cls._cache is not None:
+            ids = [persona.id_persona for persona in personas]
+            cls._invalidar_ids(ids)
+            if UnidadDeTrabajo.activa():
+                # Otra lectura puede volver a guardar la versión anterior antes del commit
+                UnidadDeTrabajo.al_confirmar(cls._invalidar_ids, ids)
+
+    @classmethod
+    def _invalidar_ids(cls, ids):
+        cache = cls._cache
+        if cache is not None:
+            for id_persona in ids:
+                cache.invalidar(id_persona)
+
+    @classmethod
+    def seleccionar_por_id(cls, id_persona):
+        cache = cls._cache
+        # Dentro de una unidad de trabajo se lee de la conexión para ver sus propios cambios
+        if cache is not None and not UnidadDeTrabajo.activa():
+            registro = cache.obtener(id_persona)
+            if registro is not None:
+                return Persona(*registro)
+        registro = cls._registro('persona_por_id', cls._SELECCIONAR_POR_ID, (id_persona,))
+        if registro is None:
+            return None
+        if cache is not None:
+            # Se guarda la fila (inmutable) y no la entidad: cada acierto crea una nueva,
+            # así modificar la que se devuelve no cambia lo que leen los demás
+            UnidadDeTrabajo.al_confirmar(cache.guardar, id_persona, registro)
+        return Persona(*registro)
+
+    @classmethod
+    def seleccionar_por_email(cls, email):
+        return cls._seleccionar_una('persona_por_email', cls._SELECCIONAR_POR_EMAIL, (email,))
+
+    @classmethod
+    def _seleccionar_una(cls, nombre, sql, valores):
+        registro = cls._registro(nombre, sql, valores)
+        return Persona(*registro) if registro else None
+
+    @classmethod
+    def _registro(cls, nombre, sql, valores):
+        with CursorDelPool() as cursor:
+            CursorDelPool.ejecutar_preparada(cursor, nombre, sql, valores)
+            registro = cursor.fetchone()
+            return tuple(registro) if registro else None
+
+    @classmethod
+    def crear_indices(cls):
+        with CursorDelPool() as cursor:
+            for indice in cls._INDICES:
+                cursor.execute(indice)
+                log.debug('Índice creado: %s', indice)
 
     @classmethod
     def insertar(cls, persona):
         with CursorDelPool() as cursor:
             valores = (persona.nombre, persona.apellido, persona.email)
-            cursor.execute(cls._INSERTAR, valores)
-            log.debug(f'Persona insertada: {persona}')
+            CursorDelPool.ejecutar_preparada(cursor, 'persona_insertar', cls._INSERTAR, valores)
+            log.debug('Persona insertada: %s', persona)
             return cursor.rowcount
 
     @classmethod
     def actualizar(cls, persona):
         with CursorDelPool() as cursor:
             valores = (persona.nombre, persona.apellido, persona.email, persona.id_persona)
-            cursor.execute(cls._ACTUALIZAR, valores)
-            log.debug(f'Persona actualizada: {persona}')
-            return cursor.rowcount
+            CursorDelPool.ejecutar_preparada(cursor, 'persona_actualizar', cls._ACTUALIZAR, valores)
+            log.debug('Persona actualizada: %s', persona)
+            actualizadas = cursor.rowcount
+        cls._invalidar_cache((persona,))
+        if cls._cache is not None and actualizadas:
+            # La nueva versión entra en la caché cuando se confirma la transacción, como
+            # copia de los valores actuales: no se guarda el objeto de quien llama
+            registro = (persona.id_persona, persona.nombre, persona.apellido, persona.email)
+            UnidadDeTrabajo.al_confirmar(cls._cache.guardar, persona.id_persona, registro)
+        return actualizadas
 
     @classmethod
     def eliminar(cls, persona):
         with CursorDelPool() as cursor:
             valores = (persona.id_persona,)
-            cursor.execute(cls._ELIMINAR, valores)
-            log.debug(f'Objeto eliminado: {persona}')
-            return cursor.rowcount
+            CursorDelPool.ejecutar_preparada(cursor, 'persona_eliminar', cls._ELIMINAR, valores)
+            log.debug('Objeto eliminado: %s', persona)
+            eliminadas = cursor.rowcount
+        cls._invalidar_cache((persona,))
+        return eliminadas
+
+    @classmethod
+    def insertar_lote(cls, personas, tamano_lote=None):
+        ids = []
+        for lote in dividir_en_lotes(personas, tamano_lote or cls._TAMANO_LOTE):
+            with CursorDelPool() as cursor:
+                valores = [(persona.nombre, persona.apellido, persona.email) for persona in lote]
+                registros = ejecutar_valores(cursor, cls._INSERTAR_LOTE, valores, fetch=True)
+            for persona, (id_persona,) in zip(lote, registros):
+                persona.id_persona = id_persona
+                ids.append(id_persona)
+            log.debug('Lote de personas insertado: %s', len(lote))
+        return ids
+
+    @classmethod
+    def actualizar_lote(cls, personas, tamano_lote=None):
+        actualizadas = 0
+        for lote in dividir_en_lotes(personas, tamano_lote or cls._TAMANO_LOTE):
+            with CursorDelPool() as cursor:
+                valores = [(persona.id_persona, persona.nombre, persona.apellido, persona.email)
+                           for persona in lote]
+                ejecutar_valores(cursor, cls._ACTUALIZAR_LOTE, valores)
+                actualizadas += cursor.rowcount
+            cls._invalidar_cache(lote)
+            log.debug('Lote de personas actualizado: %s', len(lote))
+        return actualizadas
+
+    @classmethod
+    def eliminar_lote(cls, personas, tamano_lote=None):
+        eliminadas = 0
+        for lote in dividir_en_lotes(personas, tamano_lote or cls._TAMANO_LOTE):
+            with CursorDelPool() as cursor:
+                valores = [(persona.id_persona,) for persona in lote]
+                ejecutar_valores(cursor, cls._ELIMINAR_LOTE, valores)
+                eliminadas += cursor.rowcount
+            cls._invalidar_cache(lote)
+            log.debug('Lote de personas eliminado: %s', len(lote))
+        return eliminadas
 
 if __name__ == '__main__':
     # Insertar un registro
@@ -64,7 +236,46 @@ if __name__ == '__main__':
     personas_eliminadas = PersonaDAO.eliminar(persona1)
     log.debug(f'Personas eliminadas: {personas_eliminadas}')
 
+    # Varias operaciones en una sola transacción: una conexión y un único commit
+    with UnidadDeTrabajo():
+        persona2 = Persona(nombre='Carla', apellido='Gomez', email='cgomez@mail.com')
+        PersonaDAO.insertar(persona2)
+        PersonaDAO.actualizar(Persona(1, 'Juan', 'Perez', 'juan.perez@mail.com'))
+
+    # Insertar, actualizar y eliminar por lotes
+    personas_lote = [Persona(nombre=f'Nombre{i}', apellido=f'Apellido{i}', email=f'correo{i}@mail.com')
+                     for i in range(10)]
+    ids_insertados = PersonaDAO.insertar_lote(personas_lote, tamano_lote=4)
+    log.debug(f'Ids insertados por lotes: {ids_insertados}')
+    for persona in personas_lote:
+        persona.apellido = persona.apellido.upper()
+    log.debug(f'Personas actualizadas por lotes: {PersonaDAO.actualizar_lote(personas_lote)}')
+    log.debug(f'Personas eliminadas por lotes: {PersonaDAO.eliminar_lote(personas_lote)}')
+
     # Seleccionar objetos
     personas = PersonaDAO.seleccionar()
     for persona in personas:
+        log.debug(persona)
+
+    # Recorrer la tabla página a página
+    pagina = PersonaDAO.seleccionar_pagina(limit=10)
+    while pagina:
+        log.debug('Página de %s personas desde el id %s', len(pagina), pagina[0].id_persona)
+        pagina = PersonaDAO.seleccionar_pagina(after_id=pagina[-1].id_persona, limit=10)
+    log.debug(PersonaDAO.seleccionar_por_email('jperez@mail.com'))
+
+    # Lecturas repetidas por id servidas desde la caché
+    cache = PersonaDAO.activar_cache(max_entradas=100, ttl=30)
+    for _ in range(3):
+        PersonaDAO.seleccionar_por_id(1)
+    log.debug('Estadísticas de la caché: %s', Perezoso(cache.estadisticas))
+
+    # Resultado por columnas para cálculos vectorizados
+    columnas = PersonaDAO.seleccionar_columnas()
+    dominios = [email.partition('@')[2] for email in columnas['email']]
+    log.debug(f'Personas: {len(columnas["id_persona"])}, id máximo: {columnas["id_persona"].max(initial=0)}, '
+              f'dominios distintos: {len(set(dominios))}')
+
+    # Recorrer la tabla sin cargarla entera en memoria
+    for persona in PersonaDAO.iterar(itersize=500):
         log.debug(persona)
\ No newline at end of file
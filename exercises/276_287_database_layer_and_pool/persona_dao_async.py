@@ -0,0 +1,80 @@
+import asyncio
+
+from conexion_async import ConexionAsync
+from cursor_del_pool_async import CursorDelPoolAsync
+from persona import Persona
+from persona_dao import PersonaDAO
+from logger_base import log
+
+class PersonaDAOAsync:
+    '''
+    DAO asíncrono para la tabla persona: mismas sentencias SQL que PersonaDAO,
+    ejecutadas con CursorDelPoolAsync para poder lanzar muchas consultas
+    concurrentes desde un único event loop
+    '''
+
+    @classmethod
+    async def seleccionar(cls):
+        async with CursorDelPoolAsync() as cursor:
+            await cursor.execute(PersonaDAO._SELECCIONAR)
+            return Persona.desde_registros(await cursor.fetchall())
+
+    @classmethod
+    async def iterar(cls, itersize=None):
+        '''Iterador asíncrono de personas sobre un cursor del lado del servidor'''
+        async with CursorDelPoolAsync(servidor=True, itersize=itersize or PersonaDAO._ITERSIZE) as cursor:
+            await cursor.execute(PersonaDAO._SELECCIONAR)
+            async for registro in cursor:
+                yield Persona(*registro)
+
+    @classmethod
+    async def seleccionar_pagina(cls, after_id=0, limit=None):
+        async with CursorDelPoolAsync() as cursor:
+            await cursor.execute(PersonaDAO._SELECCIONAR_PAGINA, (after_id, limit or PersonaDAO._TAMANO_PAGINA))
+            return Persona.desde_registros(await cursor.fetchall())
+
+    @classmethod
+    async def seleccionar_por_id(cls, id_persona):
+        async with CursorDelPoolAsync() as cursor:
+            await cursor.execute(PersonaDAO._SELECCIONAR_POR_ID, (id_persona,))
+            registro = await cursor.fetchone()
+            return Persona(*registro) if registro else None
+
+    @classmethod
+    async def insertar(cls, persona):
+        async with CursorDelPoolAsync() as cursor:
+            valores = (persona.nombre, persona.apellido, persona.email)
+            await cursor.execute(PersonaDAO._INSERTAR, valores)
+            log.debug('Persona insertada: %s', persona)
+            return cursor.rowcount
+
+    @classmethod
+    async def actualizar(cls, persona):
+        async with CursorDelPoolAsync() as cursor:
+            valores = (persona.nombre, persona.apellido, persona.email, persona.id_persona)
+            await cursor.execute(PersonaDAO._ACTUALIZAR, valores)
+            log.debug('Persona actualizada: %s', persona)
+            return cursor.rowcount
+
+    @classmethod
+    async def eliminar(cls, persona):
+        async with CursorDelPoolAsync() as cursor:
+            valores = (persona.id_persona,)
+            await cursor.execute(PersonaDAO._ELIMINAR, valores)
+            log.debug('Objeto eliminado: %s', persona)
+            return cursor.rowcount
+
+if __name__ == '__main__':
+    async def main():
+        # Varias consultas en vuelo a la vez sobre el mismo event loop
+        personas = await asyncio.gather(*(PersonaDAOAsync.seleccionar_por_id(i) for i in range(1, 6)))
+        log.debug(personas)
+
+        persona1 = Persona(nombre='Alejandra', apellido='Tellez', email='atellez@mail.com')
+        log.debug('Personas insertadas: %s', await PersonaDAOAsync.insertar(persona1))
+
+        async for persona in PersonaDAOAsync.iterar(itersize=500):
+            log.debug(persona)
+        await ConexionAsync.cerrarConexiones()
+
+    asyncio.run(main())
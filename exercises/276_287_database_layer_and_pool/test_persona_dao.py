@@ -0,0 +1,47 @@
+'''
+Caché de PersonaDAO.seleccionar_por_id. Usa el backend en memoria salvo que
+DB_BACKEND diga otra cosa:
+
+    python -m unittest exercises/276_287_database_layer_and_pool/test_persona_dao.py
+'''
+import os
+import sys
+import unittest
+
+_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.dirname(os.path.dirname(_DIR)), _DIR]
+os.environ.setdefault('DB_BACKEND', 'memoria')
+
+from logger_base import log
+from persona import Persona
+from persona_dao import PersonaDAO
+
+
+class CachePersonaDAOTest(unittest.TestCase):
+
+    def setUp(self):
+        log.getLogger().setLevel(log.WARNING)
+        self.cache = PersonaDAO.activar_cache()
+        self.addCleanup(PersonaDAO.desactivar_cache)
+        self.persona = Persona(nombre='Ana', apellido='Pérez', email='orig@x')
+        PersonaDAO.insertar_lote([self.persona])
+        self.addCleanup(PersonaDAO.eliminar_lote, [self.persona])
+
+    def test_modificar_la_entidad_devuelta_no_cambia_la_cache(self):
+        leida = PersonaDAO.seleccionar_por_id(self.persona.id_persona)
+        leida.email = 'no_guardado@x'
+        otra = PersonaDAO.seleccionar_por_id(self.persona.id_persona)
+        self.assertEqual(self.cache.aciertos, 1)
+        self.assertIsNot(otra, leida)
+        self.assertEqual(otra.email, 'orig@x')
+
+    def test_actualizar_guarda_una_copia(self):
+        self.persona.email = 'nuevo@x'
+        PersonaDAO.actualizar(self.persona)
+        self.persona.email = 'no_guardado@x'
+        self.assertEqual(PersonaDAO.seleccionar_por_id(self.persona.id_persona).email, 'nuevo@x')
+        self.assertEqual(self.cache.aciertos, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
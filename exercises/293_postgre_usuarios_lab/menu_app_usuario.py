@@ -2,19 +2,25 @@ from usuario import Usuario
 from usuario_dao import UsuarioDAO
 from logger_base import log
 
+_TAMANO_PAGINA = 20
+
 opcion = None
 while opcion != 5:
     print('Opciones:')
-    print('1. Listar usuarios')
+    print('1. Listar usuarios (por páginas)')
     print('2. Agregar usuario')
     print('3. Modificar usuario')
     print('4. Eliminar usuario')
     print('5. Salir')
     opcion = int(input('Escribe tu opcion (1-5): '))
     if opcion == 1:
-        usuarios = UsuarioDAO.seleccionar()
-        for usuario in usuarios:
-            log.info(usuario)
+        usuarios = UsuarioDAO.seleccionar_pagina(limit=_TAMANO_PAGINA)
+        while usuarios:
+            for usuario in usuarios:
+                log.info(usuario)
+            if len(usuarios) < _TAMANO_PAGINA or input('¿Siguiente página? (s/n): ').lower() != 's':
+                break
+            usuarios = UsuarioDAO.seleccionar_pagina(after_id=usuarios[-1].id_usuario, limit=_TAMANO_PAGINA)
     elif opcion == 2:
         username_var = input('Escribe el username: ')
         password_var = input('Escribe el password: ')
@@ -1,4 +1,10 @@
+from itertools import starmap
+
+
 class Usuario:
+    # Sin __dict__ por instancia: cada usuario solo reserva sus tres atributos
+    __slots__ = ('_id_usuario', '_username', '_password')
+
     def __init__(self, id_usuario=None, username=None, password=None):
         self._id_usuario = id_usuario
         self._username = username
@@ -7,6 +13,11 @@ class Usuario:
     def __str__(self):
         return f'Usuario: {self._id_usuario} {self._username} {self._password}'
 
+    @classmethod
+    def desde_registros(cls, registros):
+        '''Convierte filas (id_usuario, username, password) en usuarios de una pasada'''
+        return list(starmap(cls, registros))
+
     @property
     def id_usuario(self):
         return self._id_usuario
@@ -29,4 +40,4 @@ class Usuario:
 
     @password.setter
     def password(self, password):
-        self._password = password
\ No newline at end of file
+        self._password = password
@@ -1,6 +1,10 @@
-from cursor_del_pool import CursorDelPool
+from itertools import starmap
+
+from cursor_del_pool import CursorDelPool, UnidadDeTrabajo
 from logger_base import log
+from cache_entidades import CacheLRU
 from usuario import Usuario
+from utilidades_dao import dividir_en_lotes, ejecutar_valores, importar_numpy, leer_columnas
 
 
 class UsuarioDAO:
@@ -12,39 +16,208 @@ class UsuarioDAO:
     _INSERTAR = 'INSERT INTO usuario(username, password) VALUES(%s, %s)'
     _ACTUALIZAR = 'UPDATE usuario SET username=%s, password=%s WHERE id_usuario=%s'
     _ELIMINAR = 'DELETE FROM usuario WHERE id_usuario=%s'
+    # Los listados y recorridos pueden leerse de una réplica (solo_lectura=True); las
+    # búsquedas por clave van a la primaria para ver las escrituras recién confirmadas
+    _ITERSIZE = 2000
+    _COLUMNAS = ('id_usuario', 'username', 'password')
+    _SELECCIONAR_COLUMNAS = 'SELECT id_usuario, username, password FROM usuario ORDER BY id_usuario'
+    # Paginación por clave (keyset) y búsquedas: coste proporcional a la página, no a la tabla.
+    # id_usuario usa el índice de la clave primaria; la búsqueda por username necesita _INDICES.
+    _SELECCIONAR_PAGINA = ('SELECT id_usuario, username, password FROM usuario '
+                           'WHERE id_usuario > %s ORDER BY id_usuario LIMIT %s')
+    _SELECCIONAR_POR_ID = 'SELECT id_usuario, username, password FROM usuario WHERE id_usuario=%s'
+    _SELECCIONAR_POR_USERNAME = ('SELECT id_usuario, username, password FROM usuario '
+                                 'WHERE username=%s ORDER BY id_usuario LIMIT 1')
+    _INDICES = ('CREATE INDEX IF NOT EXISTS usuario_username_idx ON usuario (username)',)
+    _TAMANO_PAGINA = 50
+    # Caché opcional de usuarios por id_usuario (ver activar_cache)
+    _cache = None
+    # Operaciones por lotes: una sentencia multi-fila y una transacción por lote
+    _TAMANO_LOTE = 1000
+    _INSERTAR_LOTE = 'INSERT INTO usuario(username, password) VALUES %s RETURNING id_usuario'
+    _ACTUALIZAR_LOTE = ('WITH v(id_usuario, username, password) AS (VALUES %s) '
+                        'UPDATE usuario SET username=v.username, password=v.password '
+                        'FROM v WHERE usuario.id_usuario=v.id_usuario')
+    _ELIMINAR_LOTE = 'DELETE FROM usuario WHERE id_usuario IN (VALUES %s)'
 
     @classmethod
     def seleccionar(cls):
-        with CursorDelPool() as cursor:
+        with CursorDelPool(solo_lectura=True) as cursor:
             log.debug('Seleccionando usuarios')
             cursor.execute(cls._SELECT)
-            registros = cursor.fetchall()
-            usuarios = []
-            for registro in registros:
-                usuario = Usuario(registro[0], registro[1], registro[2])
-                usuarios.append(usuario)
-            return usuarios
+            return Usuario.desde_registros(cursor.fetchall())
+
+    @classmethod
+    def iterar(cls, itersize=None):
+        '''
+        Generador de usuarios con un cursor del lado del servidor: las filas
+        llegan en bloques de itersize y la conexión se libera al terminar
+        '''
+        with CursorDelPool(servidor=True, itersize=itersize or cls._ITERSIZE, solo_lectura=True) as cursor:
+            log.debug('Recorriendo usuarios')
+            cursor.execute(cls._SELECT)
+            yield from starmap(Usuario, cursor)
+
+    @classmethod
+    def seleccionar_columnas(cls, tamano_bloque=None):
+        '''
+        Modo columnar: {'id_usuario': int64, 'username': ..., 'password': ...} como
+        arrays de NumPy, leídos por bloques sin crear un Usuario por fila
+        '''
+        # Sin NumPy se falla antes de ocupar una conexión y lanzar la consulta
+        importar_numpy()
+        tamano_bloque = tamano_bloque or cls._ITERSIZE
+        with CursorDelPool(servidor=True, itersize=tamano_bloque, solo_lectura=True) as cursor:
+            log.debug('Seleccionando usuarios por columnas')
+            cursor.execute(cls._SELECCIONAR_COLUMNAS)
+            return leer_columnas(cursor, cls._COLUMNAS, numericas=('id_usuario',), tamano_bloque=tamano_bloque)
+
+    @classmethod
+    def seleccionar_pagina(cls, after_id=0, limit=None):
+        '''
+        Devuelve como mucho `limit` usuarios con id_usuario > after_id; la siguiente
+        página empieza tras el id_usuario del último usuario recibido
+        '''
+        with CursorDelPool(solo_lectura=True) as cursor:
+            log.debug('Seleccionando página de usuarios tras el id %s', after_id)
+            cursor.execute(cls._SELECCIONAR_PAGINA, (after_id, limit or cls._TAMANO_PAGINA))
+            return Usuario.desde_registros(cursor.fetchall())
+
+    @classmethod
+    def activar_cache(cls, max_entradas=1024, ttl=60):
+        '''
+        Activa una caché LRU con caducidad para seleccionar_por_id; las escrituras
+        del DAO la refrescan o invalidan tras el commit
+        '''
+        cls._cache = CacheLRU(max_entradas, ttl)
+        return cls._cache
+
+    @classmethod
+    def desactivar_cache(cls):
+        cls._cache = None
+
+    @classmethod
+    def _invalidar_cache(cls, usuarios):
+        if cls._cache is not None:
+            ids = [usuario.id_usuario for usuario in usuarios]
+            cls._invalidar_ids(ids)
+            if UnidadDeTrabajo.activa():
+                # Otra lectura puede volver a guardar la versión anterior antes del commit
+                UnidadDeTrabajo.al_confirmar(cls._invalidar_ids, ids)
+
+    @classmethod
+    def _invalidar_ids(cls, ids):
+        cache = cls._cache
+        if cache is not None:
+            for id_usuario in ids:
+                cache.invalidar(id_usuario)
+
+    @classmethod
+    def seleccionar_por_id(cls, id_usuario):
+        cache = cls._cache
+        # Dentro de una unidad de trabajo se lee de la conexión para ver sus propios cambios
+        if cache is not None and not UnidadDeTrabajo.activa():
+            registro = cache.obtener(id_usuario)
+            if registro is not None:
+                return Usuario(*registro)
+        registro = cls._registro('usuario_por_id', cls._SELECCIONAR_POR_ID, (id_usuario,))
+        if registro is None:
+            return None
+        if cache is not None:
+            # Se guarda la fila (inmutable) y no la entidad: cada acierto crea una nueva,
+            # así modificar la que se devuelve no cambia lo que leen los demás
+            UnidadDeTrabajo.al_confirmar(cache.guardar, id_usuario, registro)
+        return Usuario(*registro)
+
+    @classmethod
+    def seleccionar_por_username(cls, username):
+        return cls._seleccionar_uno('usuario_por_username', cls._SELECCIONAR_POR_USERNAME, (username,))
+
+    @classmethod
+    def _seleccionar_uno(cls, nombre, sql, valores):
+        registro = cls._registro(nombre, sql, valores)
+        return Usuario(*registro) if registro else None
+
+    @classmethod
+    def _registro(cls, nombre, sql, valores):
+        with CursorDelPool() as cursor:
+            CursorDelPool.ejecutar_preparada(cursor, nombre, sql, valores)
+            registro = cursor.fetchone()
+            return tuple(registro) if registro else None
+
+    @classmethod
+    def crear_indices(cls):
+        with CursorDelPool() as cursor:
+            for indice in cls._INDICES:
+                log.debug('Creando índice: %s', indice)
+                cursor.execute(indice)
 
     @classmethod
     def insertar(cls, usuario):
         with CursorDelPool() as cursor:
-            log.debug(f'Usuario a insertar: {usuario}')
+            log.debug('Usuario a insertar: %s', usuario)
             valores = (usuario.username, usuario.password)
-            cursor.execute(cls._INSERTAR, valores)
+            CursorDelPool.ejecutar_preparada(cursor, 'usuario_insertar', cls._INSERTAR, valores)
             return cursor.rowcount
 
     @classmethod
     def actualizar(cls, usuario):
         with CursorDelPool() as cursor:
-            log.debug(f'Usuario a actualizar {usuario}')
+            log.debug('Usuario a actualizar %s', usuario)
             valores = (usuario.username, usuario.password, usuario.id_usuario)
-            cursor.execute(cls._ACTUALIZAR, valores)
-            return cursor.rowcount
+            CursorDelPool.ejecutar_preparada(cursor, 'usuario_actualizar', cls._ACTUALIZAR, valores)
+            actualizados = cursor.rowcount
+        cls._invalidar_cache((usuario,))
+        if cls._cache is not None and actualizados:
+            # La nueva versión entra en la caché cuando se confirma la transacción, como
+            # copia de los valores actuales: no se guarda el objeto de quien llama
+            registro = (usuario.id_usuario, usuario.username, usuario.password)
+            UnidadDeTrabajo.al_confirmar(cls._cache.guardar, usuario.id_usuario, registro)
+        return actualizados
 
     @classmethod
     def eliminar(cls, usuario):
         with CursorDelPool() as cursor:
-            log.debug(f'Usuario a eliminar: {usuario}')
+            log.debug('Usuario a eliminar: %s', usuario)
             valores = (usuario.id_usuario,)
-            cursor.execute(cls._ELIMINAR, valores)
-            return cursor.rowcount
\ No newline at end of file
+            CursorDelPool.ejecutar_preparada(cursor, 'usuario_eliminar', cls._ELIMINAR, valores)
+            eliminados = cursor.rowcount
+        cls._invalidar_cache((usuario,))
+        return eliminados
+
+    @classmethod
+    def insertar_lote(cls, usuarios, tamano_lote=None):
+        ids = []
+        for lote in dividir_en_lotes(usuarios, tamano_lote or cls._TAMANO_LOTE):
+            with CursorDelPool() as cursor:
+                log.debug('Lote de usuarios a insertar: %s', len(lote))
+                valores = [(usuario.username, usuario.password) for usuario in lote]
+                registros = ejecutar_valores(cursor, cls._INSERTAR_LOTE, valores, fetch=True)
+            for usuario, (id_usuario,) in zip(lote, registros):
+                usuario.id_usuario = id_usuario
+                ids.append(id_usuario)
+        return ids
+
+    @classmethod
+    def actualizar_lote(cls, usuarios, tamano_lote=None):
+        actualizados = 0
+        for lote in dividir_en_lotes(usuarios, tamano_lote or cls._TAMANO_LOTE):
+            with CursorDelPool() as cursor:
+                log.debug('Lote de usuarios a actualizar: %s', len(lote))
+                valores = [(usuario.id_usuario, usuario.username, usuario.password) for usuario in lote]
+                ejecutar_valores(cursor, cls._ACTUALIZAR_LOTE, valores)
+                actualizados += cursor.rowcount
+            cls._invalidar_cache(lote)
+        return actualizados
+
+    @classmethod
+    def eliminar_lote(cls, usuarios, tamano_lote=None):
+        eliminados = 0
+        for lote in dividir_en_lotes(usuarios, tamano_lote or cls._TAMANO_LOTE):
+            with CursorDelPool() as cursor:
+                log.debug('Lote de usuarios a eliminar: %s', len(lote))
+                valores = [(usuario.id_usuario,) for usuario in lote]
+                ejecutar_valores(cursor, cls._ELIMINAR_LOTE, valores)
+                eliminados += cursor.rowcount
+            cls._invalidar_cache(lote)
+        return eliminados
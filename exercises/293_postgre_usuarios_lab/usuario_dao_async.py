@@ -0,0 +1,64 @@
+from cursor_del_pool_async import CursorDelPoolAsync
+from logger_base import log
+from usuario import Usuario
+from usuario_dao import UsuarioDAO
+
+
+class UsuarioDAOAsync:
+    '''
+    DAO asíncrono para la tabla de usuario con las mismas sentencias que UsuarioDAO
+    '''
+
+    @classmethod
+    async def seleccionar(cls):
+        async with CursorDelPoolAsync() as cursor:
+            log.debug('Seleccionando usuarios')
+            await cursor.execute(UsuarioDAO._SELECT)
+            return Usuario.desde_registros(await cursor.fetchall())
+
+    @classmethod
+    async def iterar(cls, itersize=None):
+        '''Iterador asíncrono de usuarios sobre un cursor del lado del servidor'''
+        async with CursorDelPoolAsync(servidor=True, itersize=itersize or UsuarioDAO._ITERSIZE) as cursor:
+            log.debug('Recorriendo usuarios')
+            await cursor.execute(UsuarioDAO._SELECT)
+            async for registro in cursor:
+                yield Usuario(*registro)
+
+    @classmethod
+    async def seleccionar_pagina(cls, after_id=0, limit=None):
+        async with CursorDelPoolAsync() as cursor:
+            log.debug('Seleccionando página de usuarios tras el id %s', after_id)
+            await cursor.execute(UsuarioDAO._SELECCIONAR_PAGINA, (after_id, limit or UsuarioDAO._TAMANO_PAGINA))
+            return Usuario.desde_registros(await cursor.fetchall())
+
+    @classmethod
+    async def seleccionar_por_id(cls, id_usuario):
+        async with CursorDelPoolAsync() as cursor:
+            await cursor.execute(UsuarioDAO._SELECCIONAR_POR_ID, (id_usuario,))
+            registro = await cursor.fetchone()
+            return Usuario(*registro) if registro else None
+
+    @classmethod
+    async def insertar(cls, usuario):
+        async with CursorDelPoolAsync() as cursor:
+            log.debug('Usuario a insertar: %s', usuario)
+            valores = (usuario.username, usuario.password)
+            await cursor.execute(UsuarioDAO._INSERTAR, valores)
+            return cursor.rowcount
+
+    @classmethod
+    async def actualizar(cls, usuario):
+        async with CursorDelPoolAsync() as cursor:
+            log.debug('Usuario a actualizar %s', usuario)
+            valores = (usuario.username, usuario.password, usuario.id_usuario)
+            await cursor.execute(UsuarioDAO._ACTUALIZAR, valores)
+            return cursor.rowcount
+
+    @classmethod
+    async def eliminar(cls, usuario):
+        async with CursorDelPoolAsync() as cursor:
+            log.debug('Usuario a eliminar: %s', usuario)
+            valores = (usuario.id_usuario,)
+            await cursor.execute(UsuarioDAO._ELIMINAR, valores)
+            return cursor.rowcount
@@ -2,5 +2,19 @@ from django.contrib import admin
 from modelsapp.models import Persona, Domicilio
 
 # Register your models here.
-admin.site.register(Persona)
-admin.site.register(Domicilio)
+@admin.register(Persona)
+class PersonaAdmin(admin.ModelAdmin):
+    list_display = ('id', 'nombre', 'apellido', 'email', 'domicilio')
+    # Un JOIN con domicilio en lugar de una consulta por fila de la lista
+    list_select_related = ('domicilio',)
+    list_per_page = 50
+    # Con muchos domicilios un <select> con todos ellos haría pesado el formulario
+    raw_id_fields = ('domicilio',)
+    search_fields = ('nombre', 'apellido', 'email')
+
+
+@admin.register(Domicilio)
+class DomicilioAdmin(admin.ModelAdmin):
+    list_display = ('id', 'calle', 'numero', 'municipio')
+    list_per_page = 50
+    search_fields = ('calle', 'municipio')
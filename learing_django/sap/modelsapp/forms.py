@@ -1,6 +1,6 @@
 from django.forms import ModelForm, EmailInput
 
-from modelsapp.models import Persona
+from modelsapp.models import Domicilio, Persona
 
 
 class PersonaForm(ModelForm):
@@ -15,4 +15,6 @@ class PersonaForm(ModelForm):
         super().__init__(*args, **kwargs)
         if not editable:
             for field in self.fields.values():
-                field.disabled = True  # Desactiva todos los campos
\ No newline at end of file
+                field.disabled = True  # Desactiva todos los campos
+            # Solo lectura: basta con la opción del domicilio actual, no toda la tabla
+            self.fields['domicilio'].queryset = Domicilio.objects.filter(pk=self.instance.domicilio_id)
@@ -0,0 +1,74 @@
+import contextlib
+import csv
+import json
+import os
+import sys
+from itertools import islice
+
+# Columnas de los ficheros de import_personas/export_personas: el domicilio va por
+# sus campos (calle, numero, municipio) y no por id, así el fichero sirve entre bases
+COLUMNAS = ('id', 'nombre', 'apellido', 'email', 'calle', 'numero', 'municipio')
+FORMATOS = ('csv', 'jsonl')
+
+
+def detectar_formato(ruta, formato=None):
+    if formato is None:
+        formato = os.path.splitext(ruta)[1].lstrip('.').lower() or 'csv'
+    if formato not in FORMATOS:
+        raise ValueError(f'Formato no soportado: {formato} (usa {", ".join(FORMATOS)})')
+    return formato
+
+
+def abrir(ruta, modo):
+    # '-' es la entrada o salida estándar (que no se cierra al terminar)
+    if ruta == '-':
+        return contextlib.nullcontext(sys.stdin if modo == 'r' else sys.stdout)
+    return open(ruta, modo, newline='', encoding='utf-8')
+
+
+def lotes(iterable, tamano):
+    '''Listas de como mucho `tamano` elementos sin materializar el iterable entero'''
+    iterador = iter(iterable)
+    while lote := list(islice(iterador, tamano)):
+        yield lote
+
+
+def leer_filas(fichero, formato):
+    '''
+    Generador fila a fila que nunca carga el fichero entero: diccionarios en CSV
+    y las líneas sin interpretar en JSONL, para que una línea mal formada se
+    pueda omitir con decodificar() sin detener la lectura
+    '''
+    if formato == 'csv':
+        yield from csv.DictReader(fichero)
+    else:
+        for linea in fichero:
+            if linea.strip():
+                yield linea
+
+
+def decodificar(fila):
+    '''Diccionario de una fila de leer_filas; ValueError si la línea no es un objeto JSON'''
+    if isinstance(fila, dict):
+        return fila
+    valor = json.loads(fila)
+    if not isinstance(valor, dict):
+        raise ValueError('la línea no es un objeto JSON')
+    return valor
+
+
+class Escritor:
+    def __init__(self, fichero, formato):
+        self._fichero = fichero
+        self._csv = None
+        if formato == 'csv':
+            self._csv = csv.writer(fichero)
+            self._csv.writerow(COLUMNAS)
+
+    def escribir(self, filas):
+        '''filas: tuplas en el orden de COLUMNAS'''
+        if self._csv is not None:
+            self._csv.writerows(filas)
+        else:
+            self._fichero.writelines(json.dumps(dict(zip(COLUMNAS, fila)), ensure_ascii=False) + '\n'
+                                     for fila in filas)
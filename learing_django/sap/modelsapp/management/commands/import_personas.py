@@ -0,0 +1,92 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from modelsapp.intercambio import FORMATOS, abrir, decodificar, detectar_formato, leer_filas, lotes
+from modelsapp.models import Domicilio, Persona
+from modelsapp.signals import carga_masiva
+
+
+def _cadena(fila, campo):
+    # En JSONL los valores pueden llegar como números u otros tipos
+    valor = fila.get(campo)
+    return '' if valor is None else str(valor).strip()
+
+
+def _texto(fila, campo):
+    valor = _cadena(fila, campo)
+    if not valor:
+        raise ValueError(f'falta {campo}')
+    return valor
+
+
+def _clave_domicilio(fila):
+    # Un domicilio se identifica por (calle, numero, municipio); sin calle no hay domicilio
+    calle = _cadena(fila, 'calle')
+    if not calle:
+        return None
+    return calle, int(_cadena(fila, 'numero')), _texto(fila, 'municipio')
+
+
+class Command(BaseCommand):
+    help = ('Importa personas y sus domicilios desde un CSV o JSONL (columnas de '
+            'modelsapp.intercambio.COLUMNAS; el id se ignora) por lotes con bulk_create')
+
+    def add_arguments(self, parser):
+        parser.add_argument('ruta', help="Fichero .csv o .jsonl, o '-' para la entrada estándar")
+        parser.add_argument('--formato', choices=FORMATOS, help='Por defecto, según la extensión')
+        parser.add_argument('--lote', type=int, default=2000, help='Filas por lote y por INSERT')
+
+    def handle(self, *args, ruta, formato, lote, **opciones):
+        try:
+            formato = detectar_formato(ruta, formato)
+        except ValueError as e:
+            raise CommandError(e)
+        # Búsqueda en memoria de los domicilios existentes: ninguna consulta por fila
+        domicilios = {(calle, numero, municipio): id_domicilio
+                      for calle, numero, municipio, id_domicilio
+                      in Domicilio.objects.values_list('calle', 'numero', 'municipio', 'id').iterator(chunk_size=lote)}
+        importadas = omitidas = 0
+        inicio = time.perf_counter()
+        try:
+            with abrir(ruta, 'r') as fichero:
+                for filas in lotes(enumerate(leer_filas(fichero, formato), 1), lote):
+                    creadas, descartadas = self._importar_lote(filas, domicilios, lote)
+                    importadas += creadas
+                    omitidas += descartadas
+                    self.stdout.write(f'{importadas} personas importadas...')
+        finally:
+            if importadas:
+                carga_masiva.send(sender=Persona)
+        self.stdout.write(self.style.SUCCESS(
+            f'{importadas} personas importadas y {omitidas} filas omitidas en {time.perf_counter() - inicio:.1f}s'))
+
+    def _importar_lote(self, filas, domicilios, lote):
+        personas = []
+        claves = []
+        omitidas = 0
+        for numero_fila, fila in filas:
+            try:
+                fila = decodificar(fila)
+                clave = _clave_domicilio(fila)
+                persona = Persona(nombre=_texto(fila, 'nombre'), apellido=_texto(fila, 'apellido'),
+                                  email=_texto(fila, 'email'))
+            except (TypeError, ValueError) as e:
+                omitidas += 1
+                self.stderr.write(f'Fila {numero_fila} omitida: {e}')
+                continue
+            claves.append(clave)
+            personas.append(persona)
+        nuevas = {clave for clave in claves if clave is not None and clave not in domicilios}
+        # Un lote entero, con sus domicilios nuevos, se guarda o se deshace junto
+        with transaction.atomic():
+            if nuevas:
+                for domicilio in Domicilio.objects.bulk_create(
+                        [Domicilio(calle=calle, numero=numero, municipio=municipio) for calle, numero, municipio in nuevas],
+                        batch_size=lote):
+                    domicilios[domicilio.calle, domicilio.numero, domicilio.municipio] = domicilio.id
+            for persona, clave in zip(personas, claves):
+                persona.domicilio_id = domicilios[clave] if clave is not None else None
+            Persona.objects.bulk_create(personas, batch_size=lote)
+        return len(personas), omitidas
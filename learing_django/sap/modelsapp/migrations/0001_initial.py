@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Domicilio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('calle', models.CharField(max_length=255)),
+                ('numero', models.IntegerField()),
+                ('municipio', models.CharField(max_length=255)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Persona',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=255)),
+                ('apellido', models.CharField(max_length=255)),
+                ('email', models.EmailField(max_length=255)),
+                ('domicilio', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='modelsapp.domicilio')),
+            ],
+        ),
+    ]
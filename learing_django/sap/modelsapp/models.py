@@ -10,12 +10,34 @@ class Domicilio(models.Model):
     def __str__(self):
         return f"Domicilio {self.id}: {self.calle}, {self.numero} ({self.municipio})"
 
+class PersonaQuerySet(models.QuerySet):
+    def para_listado(self):
+        # Solo las columnas que pinta la lista de personas
+        return self.only('id', 'nombre', 'apellido', 'email').order_by('id')
+
+    def pagina(self, despues=None, antes=None, tamano=50):
+        '''
+        Paginación por cursor sobre la clave primaria (usa su índice, coste constante
+        sea cual sea la página): las `tamano` personas con id > despues, o las
+        anteriores a `antes`. Se pide una fila de más solo para saber si hay otra
+        página en ese sentido. Devuelve (personas, hay_mas).
+        '''
+        if antes is not None:
+            personas = list(self.filter(id__lt=antes).order_by('-id')[:tamano + 1])
+            hay_mas = len(personas) > tamano
+            return personas[:tamano][::-1], hay_mas
+        consulta = self if despues is None else self.filter(id__gt=despues)
+        personas = list(consulta.order_by('id')[:tamano + 1])
+        return personas[:tamano], len(personas) > tamano
+
 class Persona(models.Model):
     nombre = models.CharField(max_length=255)
     apellido = models.CharField(max_length=255)
     email = models.EmailField(max_length=255)
     domicilio = models.ForeignKey(Domicilio, on_delete=models.SET_NULL, null=True)
 
+    objects = PersonaQuerySet.as_manager()
+
     def __str__(self):
         return f"Persona {self.id}: {self.nombre} {self.apellido} - {self.email} - {self.domicilio}"
 
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# bulk_create/update no envían post_save: las cargas masivas avisan con esta señal
+# (sender=modelo) para que quien cachea datos de ese modelo los invalide
+carga_masiva = Signal()
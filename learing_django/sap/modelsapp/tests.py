@@ -1,3 +1,125 @@
+import csv
+import io
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from modelsapp.intercambio import COLUMNAS
+from modelsapp.models import Domicilio, Persona
+
+
+class PersonaAdminTest(TestCase):
+    '''El listado del admin no debe hacer una consulta de domicilio por persona'''
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@mail.com', 'admin'))
+
+    def crear_personas(self, cantidad):
+        # Un domicilio distinto por persona, el peor caso para __str__
+        for i in range(cantidad):
+            domicilio = Domicilio.objects.create(calle=f'Calle{i}', numero=i, municipio='CDMX')
+            Persona.objects.create(nombre=f'Nombre{i}', apellido=f'Apellido{i}',
+                                   email=f'correo{i}@mail.com', domicilio=domicilio)
+
+    def consultas_listado(self):
+        with CaptureQueriesContext(connection) as capturadas:
+            respuesta = self.client.get('/admin/modelsapp/persona/')
+        self.assertEqual(respuesta.status_code, 200)
+        return len(capturadas)
+
+    def test_listado_constante(self):
+        self.crear_personas(2)
+        pocas = self.consultas_listado()
+        self.crear_personas(20)
+        self.assertEqual(self.consultas_listado(), pocas)
+
+    def test_listado_paginado(self):
+        self.crear_personas(60)
+        respuesta = self.client.get('/admin/modelsapp/persona/')
+        self.assertEqual(len(respuesta.context['cl'].result_list), 50)
+
+
+class IntercambioPersonasTest(TestCase):
+    '''import_personas y export_personas: ida y vuelta y consultas por lote, no por fila'''
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directorio.cleanup)
+
+    def ruta(self, nombre):
+        return os.path.join(self.directorio.name, nombre)
+
+    def importar(self, ruta, **opciones):
+        salida, errores = io.StringIO(), io.StringIO()
+        call_command('import_personas', ruta, stdout=salida, stderr=errores, **opciones)
+        return errores.getvalue()
+
+    def escribir_csv(self, nombre, filas):
+        ruta = self.ruta(nombre)
+        with open(ruta, 'w', newline='', encoding='utf-8') as fichero:
+            escritor = csv.writer(fichero)
+            escritor.writerow(COLUMNAS)
+            escritor.writerows(filas)
+        return ruta
+
+    def test_ida_y_vuelta(self):
+        domicilio = Domicilio.objects.create(calle='Reforma', numero=1, municipio='CDMX')
+        campos = ('nombre', 'apellido', 'email', 'domicilio_id')
+        for formato in ('csv', 'jsonl'):
+            with self.subTest(formato=formato):
+                Persona.objects.create(nombre='Ana', apellido='Pérez', email='ana@mail.com', domicilio=domicilio)
+                Persona.objects.create(nombre='Luis', apellido='Gómez', email='luis@mail.com')
+                originales = list(Persona.objects.order_by('id').values_list(*campos))
+                ruta = self.ruta(f'personas.{formato}')
+                call_command('export_personas', ruta, stdout=io.StringIO())
+                Persona.objects.all().delete()
+                self.importar(ruta)
+                # El domicilio existente se reutiliza en lugar de duplicarse
+                self.assertEqual(list(Persona.objects.order_by('id').values_list(*campos)), originales)
+                self.assertEqual(Domicilio.objects.count(), 1)
+                Persona.objects.all().delete()
+
+    def test_filas_invalidas_omitidas(self):
+        ruta = self.escribir_csv('personas.csv', [
+            ('', 'Ana', 'Pérez', 'ana@mail.com', 'Juárez', '5', 'Toluca'),
+            ('', '', 'SinNombre', 'x@mail.com', '', '', ''),
+            ('', 'Eva', 'Ruiz', 'eva@mail.com', 'Juárez', 'cinco', 'Toluca'),
+            ('', 'Leo', 'Díaz', 'leo@mail.com', 'Juárez', '5', 'Toluca'),
+        ])
+        errores = self.importar(ruta)
+        self.assertIn('Fila 2 omitida', errores)
+        self.assertIn('Fila 3 omitida', errores)
+        self.assertEqual(sorted(Persona.objects.values_list('nombre', flat=True)), ['Ana', 'Leo'])
+        self.assertEqual(Domicilio.objects.count(), 1)
+
+        Persona.objects.all().delete()
+        ruta = self.ruta('personas.jsonl')
+        with open(ruta, 'w', encoding='utf-8') as fichero:
+            fichero.write('{"nombre": 123, "apellido": "Pérez", "email": "ana@mail.com", '
+                          '"calle": "Juárez", "numero": 5, "municipio": "Toluca"}\n'
+                          '{"nombre": "Eva", "apellido": \n'
+                          '["no", "es", "un", "objeto"]\n'
+                          '{"nombre": "Leo", "apellido": "Díaz", "email": "leo@mail.com", "numero": null}\n')
+        errores = self.importar(ruta)
+        self.assertIn('Fila 2 omitida', errores)
+        self.assertIn('Fila 3 omitida', errores)
+        # Los valores que no son cadenas se convierten en lugar de detener la importación
+        self.assertEqual(sorted(Persona.objects.values_list('nombre', flat=True)), ['123', 'Leo'])
+        self.assertEqual(Domicilio.objects.count(), 1)
+
+    def test_consultas_por_lote(self):
+        def consultas(cantidad):
+            ruta = self.escribir_csv(f'personas{cantidad}.csv', [
+                ('', f'Nombre{i}', 'Apellido', f'correo{i}@mail.com', f'Calle{i}', str(i), 'CDMX')
+                for i in range(cantidad)])
+            with CaptureQueriesContext(connection) as capturadas:
+                self.importar(ruta, lote=1000)
+            return len(capturadas)
 
-# Create your tests here.
+        self.assertEqual(consultas(5), consultas(200))
+        self.assertEqual(Persona.objects.count(), 205)
@@ -74,13 +74,76 @@ WSGI_APPLICATION = 'sap.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Conexiones persistentes: POSTGRE_CONN_MAX_AGE segundos de reutilización entre
+# peticiones (0 abre una por petición, -1 sin límite) y POSTGRE_CONN_HEALTH_CHECKS
+# comprueba la conexión reutilizada antes de cada petición.
+# POSTGRE_DJANGO_POOL=1 usa el pool de Django (requiere psycopg 3) con los mismos
+# tamaños que la capa de datos (POSTGRE_MIN_CON, POSTGRE_MAX_CON, POSTGRE_POOL_*);
+# es incompatible con CONN_MAX_AGE, que pasa a 0. POSTGRE_PGBOUNCER=1 desactiva los
+# cursores del servidor, que no funcionan con PgBouncer en modo transacción.
+_CONN_MAX_AGE = int(os.getenv('POSTGRE_CONN_MAX_AGE', 60))
+_POOL_DJANGO = os.getenv('POSTGRE_DJANGO_POOL', '0') == '1'
+# En POSTGRE_POOL_MAX_VIDA y POSTGRE_POOL_MAX_INACTIVIDAD un 0 desactiva el límite,
+# como en Conexion. psycopg_pool no lo entiende así (con 0 caduca cada conexión al
+# devolverla), así que se sustituye por un año.
+_POOL_SIN_LIMITE = 365 * 24 * 3600
+
+
+def _limite_pool(variable, defecto):
+    return float(os.getenv(variable, defecto)) or _POOL_SIN_LIMITE
+
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql_psycopg2',
+        'ENGINE': 'django.db.backends.postgresql',
         'NAME': os.getenv('POSTGRE_DB'),
         'USER': os.getenv('POSTGRE_USER'),
         'PASSWORD': os.getenv('POSTGRE_PASSWORD'),
+        'HOST': os.getenv('POSTGRE_HOST'),
         'PORT': os.getenv('POSTGRE_PORT'),
+        'CONN_MAX_AGE': 0 if _POOL_DJANGO else None if _CONN_MAX_AGE < 0 else _CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': os.getenv('POSTGRE_CONN_HEALTH_CHECKS', '1') == '1',
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv('POSTGRE_PGBOUNCER', '0') == '1',
+        'OPTIONS': {},
+    }
+}
+if _POOL_DJANGO:
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.getenv('POSTGRE_MIN_CON', 1)),
+        'max_size': int(os.getenv('POSTGRE_MAX_CON', 5)),
+        'timeout': float(os.getenv('POSTGRE_POOL_TIMEOUT', 30)),
+        'max_lifetime': _limite_pool('POSTGRE_POOL_MAX_VIDA', 1800),
+        'max_idle': _limite_pool('POSTGRE_POOL_MAX_INACTIVIDAD', 600),
+    }
+
+# DB_BACKEND=sqlite|memoria (como en la capa de datos de Conexion) usa SQLite y
+# permite ejecutar la aplicación y los tests sin servidor de Postgres
+if os.getenv('DB_BACKEND') in ('sqlite', 'memoria'):
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+        'CONN_HEALTH_CHECKS': DATABASES['default']['CONN_HEALTH_CHECKS'],
+        'NAME': ':memory:' if os.getenv('DB_BACKEND') == 'memoria'
+        else os.getenv('DB_SQLITE_RUTA', BASE_DIR / 'db.sqlite3'),
+    }
+
+
+# Caché (CACHE_BACKEND): 'memoria' (LocMemCache, una por proceso), 'fichero'
+# (FileBasedCache en CACHE_RUTA, compartida entre procesos) o 'ninguna'.
+# CACHE_DURACION en segundos y CACHE_MAX_ENTRADAS antes de expulsar entradas.
+_BACKENDS_CACHE = {
+    'memoria': 'django.core.cache.backends.locmem.LocMemCache',
+    'fichero': 'django.core.cache.backends.filebased.FileBasedCache',
+    'ninguna': 'django.core.cache.backends.dummy.DummyCache',
+}
+_CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memoria')
+
+CACHES = {
+    'default': {
+        'BACKEND': _BACKENDS_CACHE[_CACHE_BACKEND],
+        'LOCATION': os.getenv('CACHE_RUTA', BASE_DIR / 'cache') if _CACHE_BACKEND == 'fichero' else 'sap',
+        'TIMEOUT': int(os.getenv('CACHE_DURACION', 300)),
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRADAS', 1000))},
     }
 }
 
@@ -0,0 +1,33 @@
+import importlib.util
+import os
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from sap import settings
+
+
+def cargar_ajustes(**entorno):
+    '''Ejecuta settings.py en un módulo aparte con `entorno` como variables de entorno'''
+    variables = {clave: valor for clave, valor in os.environ.items() if clave != 'DB_BACKEND'}
+    variables.update(entorno)
+    spec = importlib.util.spec_from_file_location('sap_settings_prueba', settings.__file__)
+    modulo = importlib.util.module_from_spec(spec)
+    with mock.patch.dict(os.environ, variables, clear=True):
+        spec.loader.exec_module(modulo)
+    return modulo
+
+
+class PoolDjangoTest(SimpleTestCase):
+
+    def test_limites_configurados(self):
+        pool = cargar_ajustes(POSTGRE_DJANGO_POOL='1', POSTGRE_POOL_MAX_VIDA='900',
+                              POSTGRE_POOL_MAX_INACTIVIDAD='120').DATABASES['default']['OPTIONS']['pool']
+        self.assertEqual((pool['max_lifetime'], pool['max_idle']), (900, 120))
+
+    def test_cero_sin_limite(self):
+        # Con 0 psycopg_pool caducaría cada conexión al devolverla y ShrinkPool no pararía
+        ajustes = cargar_ajustes(POSTGRE_DJANGO_POOL='1', POSTGRE_POOL_MAX_VIDA='0', POSTGRE_POOL_MAX_INACTIVIDAD='0')
+        pool = ajustes.DATABASES['default']['OPTIONS']['pool']
+        self.assertEqual(pool['max_lifetime'], ajustes._POOL_SIN_LIMITE)
+        self.assertEqual(pool['max_idle'], ajustes._POOL_SIN_LIMITE)
@@ -17,7 +17,7 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path
 
-from webapp.views import index_view, detalles, add_person, update_person, delete_person
+from webapp.views import index_view, detalles, add_person, update_person, delete_person, personas_json, estadisticas_cache
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -26,4 +26,6 @@ urlpatterns = [
     path('add_persona', add_person),
     path('update_persona/<int:id>', update_person),
     path('delete_persona/<int:id>', delete_person),
+    path('api/personas', personas_json, name = "personas_json"),
+    path('api/cache', estadisticas_cache, name = "estadisticas_cache"),
 ]
@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class WebappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'webapp'
+
+    def ready(self):
+        from modelsapp.models import Domicilio, Persona
+        from modelsapp.signals import carga_masiva
+        from webapp.cache_personas import invalidar
+        # Las páginas cacheadas muestran personas y domicilios: cualquier escritura las invalida
+        for modelo in (Persona, Domicilio):
+            post_save.connect(invalidar, sender=modelo, dispatch_uid=f'invalidar_cache_{modelo.__name__}')
+            post_delete.connect(invalidar, sender=modelo, dispatch_uid=f'invalidar_cache_borrado_{modelo.__name__}')
+            carga_masiva.connect(invalidar, sender=modelo, dispatch_uid=f'invalidar_cache_carga_{modelo.__name__}')
@@ -0,0 +1,62 @@
+import threading
+import time
+
+from django.core.cache import cache
+
+# Las claves de las páginas cacheadas llevan la versión de los datos: cualquier
+# escritura en Persona o Domicilio la sube (ver invalidar) y las entradas viejas
+# dejan de usarse y caducan solas, sin tener que buscarlas para borrarlas.
+CLAVE_VERSION = 'personas:version'
+
+_lock = threading.Lock()
+_aciertos = 0
+_fallos = 0
+
+
+def version():
+    # Se empieza por la hora en ns para no repetir una versión anterior si la clave se expulsa
+    return cache.get_or_set(CLAVE_VERSION, time.time_ns, None)
+
+
+def clave(*partes):
+    return ':'.join(['personas', str(version()), *map(str, partes)])
+
+
+def invalidar(*args, **kwargs):
+    '''Receptor de post_save/post_delete: nueva versión para todas las claves'''
+    try:
+        cache.incr(CLAVE_VERSION)
+    except ValueError:
+        cache.set(CLAVE_VERSION, time.time_ns(), None)
+
+
+def obtener(clave_entrada, crear):
+    '''Valor cacheado en `clave_entrada` o, si no está, crear() guardado en la caché'''
+    global _aciertos, _fallos
+    valor = cache.get(clave_entrada)
+    acierto = valor is not None
+    with _lock:
+        if acierto:
+            _aciertos += 1
+        else:
+            _fallos += 1
+    if not acierto:
+        valor = crear()
+        cache.set(clave_entrada, valor)
+    return valor
+
+
+def estadisticas():
+    # Contadores de este proceso (cada worker lleva los suyos)
+    with _lock:
+        consultas = _aciertos + _fallos
+        return {'aciertos': _aciertos,
+                'fallos': _fallos,
+                'tasa_aciertos': _aciertos / consultas if consultas else 0.0,
+                'version': version()}
+
+
+def reiniciar_estadisticas():
+    global _aciertos, _fallos
+    with _lock:
+        _aciertos = _fallos = 0
@@ -0,0 +1,71 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.test.utils import override_settings
+
+# Sin caché de páginas: cada petición tiene que ir a la base de datos
+_SIN_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+class Command(BaseCommand):
+    help = ('Latencia y peticiones por segundo de index_view abriendo una conexión por '
+            'petición (CONN_MAX_AGE=0) frente a reutilizarla (CONN_MAX_AGE>0)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--peticiones', type=int, default=500)
+        parser.add_argument('--hilos', type=int, default=1)
+        parser.add_argument('--url', default='/')
+        parser.add_argument('--max-age', type=int, default=60,
+                            help='CONN_MAX_AGE del modo con reutilización')
+
+    def handle(self, *args, **opciones):
+        base = connections['default'].settings_dict
+        self.stdout.write(f"Base de datos: {base['ENGINE']} {base.get('NAME')} "
+                          f"(CONN_MAX_AGE configurado: {base['CONN_MAX_AGE']})")
+        with override_settings(CACHES=_SIN_CACHE):
+            for nombre, max_age in (('nueva conexión por petición', 0),
+                                    (f"reutilizada (CONN_MAX_AGE={opciones['max_age']})", opciones['max_age'])):
+                self.medir(nombre, max_age, opciones['peticiones'], opciones['hilos'], opciones['url'])
+
+    def medir(self, nombre, max_age, peticiones, hilos, url):
+        # Cada hilo tiene su propia conexión. El Client de test no cierra conexiones al
+        # empezar y terminar la petición; se hace aquí, como el servidor con
+        # request_started/request_finished
+        connections['default'].settings_dict['CONN_MAX_AGE'] = max_age
+        connections.close_all()
+
+        def peticion(_):
+            cliente = Client(HTTP_HOST='localhost')
+            inicio = time.perf_counter()
+            close_old_connections()
+            respuesta = cliente.get(url)
+            close_old_connections()
+            segundos = time.perf_counter() - inicio
+            if respuesta.status_code != 200:
+                raise RuntimeError(f'{url} devolvió {respuesta.status_code}')
+            return segundos
+
+        abiertas = []
+
+        def contar(**_):
+            abiertas.append(1)
+
+        # Calentamiento: plantillas cargadas y, con reutilización, conexión abierta
+        peticion(None)
+        connection_created.connect(contar)
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(hilos) as ejecutor:
+            latencias = sorted(ejecutor.map(peticion, range(peticiones)))
+        total = time.perf_counter() - inicio
+        connection_created.disconnect(contar)
+        self.stdout.write(f'{nombre}:\n'
+                          f'  media {statistics.mean(latencias) * 1000:8.2f} ms  '
+                          f'p50 {latencias[len(latencias) // 2] * 1000:8.2f} ms  '
+                          f'p95 {latencias[int(len(latencias) * 0.95)] * 1000:8.2f} ms  '
+                          f'{peticiones / total:8.1f} peticiones/s  '
+                          f'{len(abiertas)} conexiones abiertas')
@@ -0,0 +1,130 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from modelsapp.models import Domicilio, Persona
+from webapp import cache_personas
+
+# Los tests de la caché no dependen de CACHE_BACKEND
+CACHE_MEMORIA = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def crear_personas(cantidad):
+    domicilio = Domicilio.objects.create(calle='Reforma', numero=1, municipio='CDMX')
+    Persona.objects.bulk_create(Persona(nombre=f'Nombre{i}', apellido=f'Apellido{i}',
+                                        email=f'correo{i}@mail.com', domicilio=domicilio)
+                                for i in range(cantidad))
+
+
+@override_settings(CACHES=CACHE_MEMORIA)
+class ConsultasPorVistaTest(TestCase):
+    '''Número de consultas SQL de cada vista: no debe crecer con las filas de la tabla'''
+
+    def setUp(self):
+        cache.clear()
+
+    def consultas(self, url):
+        with CaptureQueriesContext(connection) as capturadas:
+            respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        return len(capturadas)
+
+    def test_index_cacheado(self):
+        crear_personas(20)
+        # La página y el conteo; después la página entera sale de la caché
+        with self.assertNumQueries(2):
+            respuesta = self.client.get('/')
+        self.assertEqual(respuesta.context['num_personas'], 20)
+        with self.assertNumQueries(0):
+            self.client.get('/')
+
+    def test_index_constante(self):
+        crear_personas(3)
+        pocas = self.consultas('/')
+        crear_personas(300)
+        cache.clear()
+        self.assertEqual(self.consultas('/'), pocas)
+
+    def test_detalles(self):
+        crear_personas(5)
+        Domicilio.objects.bulk_create(Domicilio(calle=f'Calle{i}', numero=i, municipio='CDMX') for i in range(50))
+        persona = Persona.objects.first()
+        # La persona y la única opción del campo domicilio, sin recorrer la tabla entera
+        with self.assertNumQueries(2):
+            respuesta = self.client.get(f'/detalles_persona/{persona.id}')
+        # La opción vacía y la del domicilio de la persona
+        self.assertEqual(respuesta.content.decode().count('<option'), 2)
+
+
+class PaginacionTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        crear_personas(120)
+        self.ids = list(Persona.objects.order_by('id').values_list('id', flat=True))
+
+    def test_recorrer_paginas(self):
+        respuesta = self.client.get('/')
+        self.assertEqual([persona.id for persona in respuesta.context['personas_data']], self.ids[:50])
+        self.assertIsNone(respuesta.context['anterior'])
+        self.assertEqual(respuesta.context['siguiente'], self.ids[49])
+        respuesta = self.client.get(f'/?despues={self.ids[99]}')
+        self.assertEqual([persona.id for persona in respuesta.context['personas_data']], self.ids[100:])
+        self.assertIsNone(respuesta.context['siguiente'])
+        respuesta = self.client.get(f'/?antes={self.ids[50]}')
+        self.assertEqual([persona.id for persona in respuesta.context['personas_data']], self.ids[:50])
+        self.assertIsNone(respuesta.context['anterior'])
+
+    def test_json(self):
+        datos = self.client.get('/api/personas', {'despues': self.ids[9], 'limite': 5}).json()
+        self.assertEqual([persona['id'] for persona in datos['personas']], self.ids[10:15])
+        self.assertEqual(datos['siguiente'], self.ids[14])
+        self.assertEqual(datos['anterior'], self.ids[10])
+        self.assertEqual(datos['total'], 120)
+
+    def test_cursor_invalido(self):
+        self.assertEqual(self.client.get('/?despues=abc').status_code, 400)
+        self.assertEqual(self.client.get('/api/personas', {'limite': 'x'}).status_code, 400)
+
+
+@override_settings(CACHES=CACHE_MEMORIA)
+class InvalidacionCacheTest(TestCase):
+    '''Las escrituras desde las vistas (o cualquier save/delete) invalidan las páginas cacheadas'''
+
+    def setUp(self):
+        cache.clear()
+        cache_personas.reiniciar_estadisticas()
+        crear_personas(3)
+        self.persona = Persona.objects.first()
+
+    def datos_persona(self, **cambios):
+        datos = {'nombre': self.persona.nombre, 'apellido': self.persona.apellido,
+                 'email': self.persona.email, 'domicilio': self.persona.domicilio_id}
+        datos.update(cambios)
+        return datos
+
+    def test_alta(self):
+        self.assertContains(self.client.get('/'), 'Cantidad de personas: 3')
+        self.client.post('/add_persona', self.datos_persona(nombre='Nueva', email='nueva@mail.com'))
+        self.assertContains(self.client.get('/'), 'Cantidad de personas: 4')
+
+    def test_modificacion(self):
+        url = f'/detalles_persona/{self.persona.id}'
+        self.assertContains(self.client.get(url), self.persona.nombre)
+        self.client.post(f'/update_persona/{self.persona.id}', self.datos_persona(nombre='Cambiado'))
+        self.assertContains(self.client.get(url), 'Cambiado')
+        self.assertContains(self.client.get('/'), 'Cambiado')
+
+    def test_baja(self):
+        self.client.get('/')
+        self.client.get(f'/delete_persona/{self.persona.id}')
+        self.assertNotContains(self.client.get('/'), f'Persona {self.persona.id}:')
+
+    def test_estadisticas(self):
+        for _ in range(4):
+            self.client.get('/')
+        datos = self.client.get('/api/cache').json()
+        # Primera petición: fallo de la página y del conteo; luego tres aciertos
+        self.assertEqual((datos['aciertos'], datos['fallos']), (3, 2))
+        self.assertEqual(datos['tasa_aciertos'], 0.6)
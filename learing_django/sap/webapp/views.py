@@ -1,19 +1,87 @@
-from django.http import HttpResponse
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
+from django.template.loader import render_to_string
 
 from modelsapp.forms import PersonaForm
 from modelsapp.models import Persona
+from webapp import cache_personas
+
+TAMANO_PAGINA = 50
+MAX_TAMANO_PAGINA = 200
+
+
+def contar_personas():
+    # El total se guarda en la caché en lugar de contar la tabla en cada página
+    return cache_personas.obtener(cache_personas.clave('conteo'), Persona.objects.count)
+
+
+def _cursores(request):
+    """Cursores ?despues=<id> y ?antes=<id> como enteros (ValueError si no lo son)"""
+    despues = request.GET.get('despues')
+    antes = request.GET.get('antes')
+    return int(despues) if despues else None, int(antes) if antes else None
+
+
+def _pagina_personas(despues, antes, tamano):
+    """Devuelve (personas, anterior, siguiente) con los cursores de las páginas vecinas"""
+    personas, hay_mas = Persona.objects.para_listado().pagina(despues, antes, tamano)
+    if antes is not None:
+        hay_anterior, hay_siguiente = hay_mas, True
+    else:
+        hay_anterior, hay_siguiente = despues is not None, hay_mas
+    anterior = personas[0].id if personas and hay_anterior else None
+    siguiente = personas[-1].id if personas and hay_siguiente else None
+    return personas, anterior, siguiente
+
+
 # Create your views here.
 def index_view(request):
-    num_personas = Persona.objects.count()
-    personas_data = Persona.objects.order_by('id')
-    return render(request, 'index.html', {'num_personas':num_personas, 'personas_data': personas_data})
+    try:
+        despues, antes = _cursores(request)
+    except ValueError:
+        return HttpResponseBadRequest('Cursor de página inválido')
+
+    def renderizar():
+        personas_data, anterior, siguiente = _pagina_personas(despues, antes, TAMANO_PAGINA)
+        return render_to_string('index.html', {'num_personas': contar_personas(), 'personas_data': personas_data,
+                                               'anterior': anterior, 'siguiente': siguiente}, request)
+
+    # La página renderizada se cachea por cursor; se invalida al escribir (ver cache_personas)
+    return HttpResponse(cache_personas.obtener(cache_personas.clave('index', despues, antes), renderizar))
+
+
+def personas_json(request):
+    try:
+        despues, antes = _cursores(request)
+        tamano = max(min(int(request.GET.get('limite', TAMANO_PAGINA)), MAX_TAMANO_PAGINA), 1)
+    except ValueError:
+        return HttpResponseBadRequest('Cursor o límite inválido')
+
+    def datos():
+        personas, anterior, siguiente = _pagina_personas(despues, antes, tamano)
+        return {'total': contar_personas(),
+                'anterior': anterior,
+                'siguiente': siguiente,
+                'personas': [{'id': persona.id, 'nombre': persona.nombre,
+                              'apellido': persona.apellido, 'email': persona.email}
+                             for persona in personas]}
+
+    return JsonResponse(cache_personas.obtener(cache_personas.clave('json', despues, antes, tamano), datos))
+
+
+def estadisticas_cache(request):
+    return JsonResponse(cache_personas.estadisticas())
+
 
 def detalles(request, id):
-    persona = get_object_or_404(Persona, pk = id)
-    personaF = PersonaForm(request.POST, instance=persona,  editable = False)
+    def renderizar():
+        persona = get_object_or_404(Persona, pk = id)
+        # Formulario sin datos (solo lectura): enlazarlo a request.POST lo validaba al
+        # pintarlo y costaba dos consultas más por el campo domicilio
+        personaF = PersonaForm(instance=persona,  editable = False)
+        return render_to_string('detalles.html', {'persona': personaF}, request)
 
-    return render(request, 'detalles.html', {'persona': personaF})
+    return HttpResponse(cache_personas.obtener(cache_personas.clave('detalles', id), renderizar))
 
 
 def add_person(request):
@@ -1,27 +1,130 @@
-import logging as log
+import logging
+import atexit
 import os
-print()
+import threading
 _LOG_PATH = './log'
 LOG_FILE_NAME = f'{_LOG_PATH}/{__name__}.log'
-if not os.path.exists(_LOG_PATH):
-    os.makedirs(_LOG_PATH)
-log.basicConfig(level=log.DEBUG,
-                format='%(asctime)s: %(levelname)s [%(filename)s:%(lineno)s] %(message)s',
-                datefmt='%I:%M:%S %p',
-                handlers=[
-                    log.FileHandler(LOG_FILE_NAME, encoding='utf-8'
-),
-                    log.StreamHandler()
-                ])
+_FORMATO = '%(asctime)s: %(levelname)s [%(filename)s:%(lineno)s] %(message)s'
+_FORMATO_FECHA = '%I:%M:%S %p'
+
+
+def _crear_manejador_fichero():
+    # Rotación configurable desde el entorno: LOG_MAX_BYTES (0 sin límite de tamaño),
+    # LOG_ROTACION_SEGUNDOS (0 sin rotación por tiempo), LOG_BACKUPS, LOG_COMPRIMIR
+    # y LOG_RETENCION_DIAS (0 sin límite de antigüedad). LOG_ROTACION=0 vuelve al
+    # fichero único sin rotar.
+    if os.getenv('LOG_ROTACION', '1') == '0':
+        return logging.FileHandler(LOG_FILE_NAME, encoding='utf-8')
+    from logger_rotacion import ManejadorRotativo
+    return ManejadorRotativo(LOG_FILE_NAME,
+                             max_bytes=int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024)),
+                             intervalo=int(os.getenv('LOG_ROTACION_SEGUNDOS', 24 * 3600)),
+                             backups=int(os.getenv('LOG_BACKUPS', 7)),
+                             comprimir=os.getenv('LOG_COMPRIMIR', '1') == '1',
+                             retencion_dias=int(os.getenv('LOG_RETENCION_DIAS', 30)),
+                             encoding='utf-8')
+
+
+def _crear_manejadores():
+    # LOG_FORMATO=json escribe una línea JSON por registro en lugar del formato de texto
+    if os.getenv('LOG_FORMATO', 'texto') == 'json':
+        from logger_json import FormateadorJSON
+        formateador = FormateadorJSON()
+    else:
+        formateador = logging.Formatter(_FORMATO, _FORMATO_FECHA)
+    manejadores = [_crear_manejador_fichero(),
+                   logging.StreamHandler()]
+    for manejador in manejadores:
+        manejador.setFormatter(formateador)
+    return manejadores
+
+
+manejador_cola = None
+listener = None
+_configurado = False
+_lock_setup = threading.Lock()
+
+
+def setup():
+    '''
+    Configura el logging una sola vez (idempotente). Se llama sola la primera vez
+    que se usa `log`, así importar este módulo no toca el disco ni los manejadores.
+    LOG_MODO=cola saca el formateo y la escritura del hilo que registra: los registros
+    van a una cola acotada y un hilo en segundo plano los escribe por lotes.
+    LOG_COLA_POLITICA decide qué hacer con la cola llena: 'descartar' o 'bloquear'; los
+    descartados se avisan con un WARNING cada LOG_COLA_AVISO_SEGUNDOS y al terminar.
+    '''
+    global manejador_cola, listener, _configurado
+    if _configurado:
+        return
+    with _lock_setup:
+        if _configurado:
+            return
+        if not os.path.exists(_LOG_PATH):
+            os.makedirs(_LOG_PATH)
+        if os.getenv('LOG_MODO', 'directo') == 'cola':
+            import queue
+            from logger_cola import ManejadorCola, ListenerPorLotes
+            cola = queue.Queue(int(os.getenv('LOG_COLA_TAMANO', 10000)))
+            manejador_cola = ManejadorCola(cola, bloquear=os.getenv('LOG_COLA_POLITICA', 'descartar') == 'bloquear')
+            listener = ListenerPorLotes(cola, *_crear_manejadores(), lote=int(os.getenv('LOG_COLA_LOTE', 100)),
+                                        manejador_cola=manejador_cola,
+                                        intervalo_aviso=float(os.getenv('LOG_COLA_AVISO_SEGUNDOS', 60)))
+            listener.start()
+            # Al salir se escriben los registros que queden en la cola
+            atexit.register(listener.stop)
+            logging.basicConfig(level=logging.DEBUG, handlers=[manejador_cola])
+        else:
+            logging.basicConfig(level=logging.DEBUG, handlers=_crear_manejadores())
+        _configurado = True
+
+
+class _LogPerezoso:
+    '''
+    Se usa igual que el módulo logging (log.debug, log.INFO...). El primer acceso
+    llama a setup() y guarda el atributo en la instancia, así que los siguientes
+    accesos no tienen coste extra.
+    '''
+
+    def __getattr__(self, nombre):
+        setup()
+        valor = getattr(logging, nombre)
+        setattr(self, nombre, valor)
+        return valor
+
+
+log = _LogPerezoso()
+
+
+class Perezoso:
+    '''
+    Argumento de log que difiere una llamada costosa: la función solo se ejecuta
+    si el registro llega a formatearse, p.ej. log.debug('%s', Perezoso(obj.resumen))
+    '''
+    __slots__ = ('_funcion', '_args')
+
+    def __init__(self, funcion, *args):
+        self._funcion = funcion
+        self._args = args
+
+    def __str__(self):
+        return str(self._funcion(*self._args))
+
+
+def nivel_activo(nivel=logging.DEBUG):
+    '''Para saltarse bloques enteros que solo preparan datos para un log'''
+    setup()
+    return logging.getLogger().isEnabledFor(nivel)
 
 def clear_log_file(log_file=LOG_FILE_NAME):
     with open(log_file, 'w') as f:
         f.truncate(0)  # Vacía el archivo
 
 if __name__ == '__main__':
+    print()
     #clear_log_file()
     log.debug('Mensaje a nivel debug')
     log.info('Mensaje a nivel info')
     log.warning('Mensaje a nivel de warning')
     log.error('Mensaje a nivel de error')
-    log.critical('Mensaje a nivel critico')
\ No newline at end of file
+    log.critical('Mensaje a nivel critico')
@@ -0,0 +1,109 @@
+import logging
+import queue
+import time
+from logging.handlers import BaseRotatingHandler, QueueHandler, QueueListener
+
+# Manejadores del modo LOG_MODO=cola de logger_base. Están en un módulo aparte
+# para que importar logger_base no cargue logging.handlers si no se usa la cola.
+
+
+class ManejadorCola(QueueHandler):
+    '''QueueHandler que no formatea en el hilo llamante y aplica la política de cola llena'''
+
+    def __init__(self, cola, bloquear=False):
+        super().__init__(cola)
+        self.bloquear = bloquear
+        self.descartados = 0
+
+    def prepare(self, record):
+        # El mensaje se formatea en el hilo del listener, no en el que registra
+        return record
+
+    def enqueue(self, record):
+        if self.bloquear:
+            self.queue.put(record)
+        else:
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self.descartados += 1
+
+
+class ListenerPorLotes(QueueListener):
+    '''
+    QueueListener que vacía la cola de `lote` en `lote` registros con un único flush
+    por manejador. Si recibe el `manejador_cola` avisa con un WARNING de los registros
+    que este descartó por tener la cola llena: como mucho uno cada intervalo_aviso
+    segundos y otro al parar con los que queden por contar.
+    '''
+
+    def __init__(self, cola, *handlers, lote=100, manejador_cola=None, intervalo_aviso=60):
+        super().__init__(cola, *handlers, respect_handler_level=True)
+        self.lote = lote
+        self.manejador_cola = manejador_cola
+        self.intervalo_aviso = intervalo_aviso
+        self._avisados = 0
+        self._ultimo_aviso = None
+
+    def _monitor(self):
+        cola = self.queue
+        terminar = False
+        while not terminar:
+            registros = [cola.get()]
+            while len(registros) < self.lote:
+                try:
+                    registros.append(cola.get_nowait())
+                except queue.Empty:
+                    break
+            if self._sentinel in registros:
+                registros = registros[:registros.index(self._sentinel)]
+                terminar = True
+            for handler in self.handlers:
+                self._escribir_lote(handler, registros)
+            self._avisar_descartados(forzar=terminar)
+
+    def _avisar_descartados(self, forzar=False):
+        if self.manejador_cola is None:
+            return
+        descartados = self.manejador_cola.descartados
+        nuevos = descartados - self._avisados
+        ahora = time.monotonic()
+        reciente = self._ultimo_aviso is not None and ahora - self._ultimo_aviso < self.intervalo_aviso
+        if nuevos <= 0 or (reciente and not forzar):
+            return
+        self._avisados = descartados
+        self._ultimo_aviso = ahora
+        # Se escribe directamente en los manejadores: por log volvería a la cola llena
+        registro = logging.LogRecord(__name__, logging.WARNING, __file__, 0,
+                                     'Cola de log llena: %s registros descartados (%s en total)',
+                                     (nuevos, descartados), None)
+        for handler in self.handlers:
+            self._escribir_lote(handler, [registro])
+
+    @staticmethod
+    def _escribir_lote(handler, registros):
+        if not registros:
+            return
+        if not isinstance(handler, logging.StreamHandler) or handler.stream is None:
+            for registro in registros:
+                if registro.levelno >= handler.level:
+                    handler.handle(registro)
+            return
+        with handler.lock:
+            # Los manejadores rotativos comprueban la rotación una vez por lote, no por registro
+            # (el fichero puede pasarse de max_bytes como mucho en un lote)
+            if isinstance(handler, BaseRotatingHandler):
+                try:
+                    if handler.shouldRollover(registros[0]):
+                        handler.doRollover()
+                        if handler.stream is None:
+                            handler.stream = handler._open()
+                except Exception:
+                    handler.handleError(registros[0])
+            for registro in registros:
+                if registro.levelno >= handler.level and handler.filter(registro):
+                    try:
+                        handler.stream.write(handler.format(registro) + handler.terminator)
+                    except Exception:
+                        handler.handleError(registro)
+            handler.flush()
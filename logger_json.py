@@ -0,0 +1,42 @@
+import json
+import logging
+import os
+import socket
+
+# Formateador JSON de logger_base (LOG_FORMATO=json): una línea JSON por registro,
+# fácil de agregar. Los campos fijos se serializan una sola vez al crearlo.
+
+_codificar = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=str).encode
+
+
+class FormateadorJSON(logging.Formatter):
+    '''
+    Produce {"app":...,"host":...,"pid":...,"ts":...,"nivel":...,"origen":...,"mensaje":...}
+    más "datos" si el registro lleva extra={'datos': {...}} y "excepcion" si la hay
+    '''
+
+    def __init__(self, estaticos=None):
+        super().__init__()
+        if estaticos is None:
+            estaticos = {'app': os.getenv('LOG_APP', 'python_summary'),
+                         'host': socket.gethostname(),
+                         'pid': os.getpid()}
+        self._prefijo = '{' + ''.join(f'{_codificar(clave)}:{_codificar(valor)},'
+                                      for clave, valor in estaticos.items())
+        self._origenes = {}
+
+    def format(self, record):
+        # El origen (fichero:línea) se repite mucho: se serializa una vez y se reutiliza
+        clave_origen = (record.filename, record.lineno)
+        origen = self._origenes.get(clave_origen)
+        if origen is None:
+            origen = self._origenes[clave_origen] = _codificar(f'{record.filename}:{record.lineno}')
+        partes = [self._prefijo, '"ts":', f'{record.created:.6f}', ',"nivel":"', record.levelname,
+                  '","origen":', origen, ',"mensaje":', _codificar(record.getMessage())]
+        datos = getattr(record, 'datos', None)
+        if datos:
+            partes += (',"datos":', _codificar(datos))
+        if record.exc_info:
+            partes += (',"excepcion":', _codificar(self.formatException(record.exc_info)))
+        partes.append('}')
+        return ''.join(partes)
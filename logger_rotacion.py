@@ -0,0 +1,81 @@
+import glob
+import gzip
+import os
+import queue
+import shutil
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+
+# Manejador de fichero de logger_base con rotación por tamaño y por tiempo,
+# compresión gzip en segundo plano de los segmentos rotados y retención por
+# número de copias y por antigüedad.
+
+
+class ManejadorRotativo(RotatingFileHandler):
+    '''
+    Rota cuando el fichero supera max_bytes o han pasado `intervalo` segundos
+    desde la última rotación. Conserva `backups` segmentos (log.1.gz, log.2.gz...)
+    y borra los que tengan más de retencion_dias días.
+    '''
+
+    def __init__(self, filename, max_bytes=0, intervalo=0, backups=7, comprimir=True, retencion_dias=0,
+                 encoding=None):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backups, encoding=encoding)
+        self.intervalo = intervalo
+        self.retencion_dias = retencion_dias
+        self._siguiente_rotacion = time.time() + intervalo if intervalo else None
+        self._compresiones = None
+        if comprimir:
+            self.namer = lambda nombre: nombre + '.gz'
+            self.rotator = self._rotar_comprimiendo
+            self._compresiones = queue.Queue()
+            threading.Thread(target=self._comprimir, name='log-compresion', daemon=True).start()
+
+    def shouldRollover(self, record):
+        if self._siguiente_rotacion is not None and time.time() >= self._siguiente_rotacion:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        if self._compresiones is not None:
+            # La compresión anterior tiene que acabar antes de desplazar los segmentos
+            self._compresiones.join()
+        super().doRollover()
+        if self.intervalo:
+            self._siguiente_rotacion = time.time() + self.intervalo
+        if self.retencion_dias:
+            self._purgar()
+
+    def _rotar_comprimiendo(self, origen, destino):
+        # En el hilo que registra solo se renombra; el gzip se hace en segundo plano
+        temporal = f'{destino}.{time.time_ns()}.tmp'
+        os.rename(origen, temporal)
+        self._compresiones.put((temporal, destino))
+
+    def _comprimir(self):
+        while True:
+            temporal, destino = self._compresiones.get()
+            try:
+                with open(temporal, 'rb') as entrada, gzip.open(destino, 'wb') as salida:
+                    shutil.copyfileobj(entrada, salida)
+                os.remove(temporal)
+            except OSError as e:
+                # No se usa logging aquí para no volver a entrar en este manejador
+                print(f'Error comprimiendo {temporal}: {e}')
+            finally:
+                self._compresiones.task_done()
+
+    def _purgar(self):
+        limite = time.time() - self.retencion_dias * 86400
+        for segmento in glob.glob(f'{glob.escape(self.baseFilename)}.*'):
+            try:
+                if os.path.getmtime(segmento) < limite:
+                    os.remove(segmento)
+            except OSError:
+                pass
+
+    def close(self):
+        if self._compresiones is not None:
+            self._compresiones.join()
+        super().close()
@@ -0,0 +1,242 @@
+import threading
+import time
+from bisect import bisect_left
+
+from logger_base import log
+
+# Límites (en segundos) por defecto de los histogramas de latencia
+_LIMITES_LATENCIA = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                     0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Contador:
+    __slots__ = ('valor', '_lock')
+
+    def __init__(self):
+        self.valor = 0
+        self._lock = threading.Lock()
+
+    def inc(self, cantidad=1):
+        # acquire/release explícitos: el with del lock cuesta casi el doble en la ruta caliente
+        self._lock.acquire()
+        try:
+            self.valor += cantidad
+        finally:
+            self._lock.release()
+
+    def instantanea(self):
+        return self.valor
+
+    def reiniciar(self):
+        with self._lock:
+            self.valor = 0
+
+
+class Medidor:
+    '''Valor que sube y baja; con `funcion` se lee en el momento de la instantánea'''
+    __slots__ = ('valor', '_funcion')
+
+    def __init__(self, funcion=None):
+        self.valor = 0
+        self._funcion = funcion
+
+    def set(self, valor):
+        self.valor = valor
+
+    def instantanea(self):
+        return self._funcion() if self._funcion is not None else self.valor
+
+    def reiniciar(self):
+        self.valor = 0
+
+
+class Histograma:
+    __slots__ = ('limites', '_cuentas', 'suma', '_lock')
+
+    def __init__(self, limites=_LIMITES_LATENCIA):
+        self.limites = tuple(limites)
+        self._cuentas = [0] * (len(self.limites) + 1)
+        self.suma = 0.0
+        self._lock = threading.Lock()
+
+    def observar(self, valor):
+        indice = bisect_left(self.limites, valor)
+        # El total de observaciones no se guarda aparte: es la suma de las cubetas
+        self._lock.acquire()
+        try:
+            self._cuentas[indice] += 1
+            self.suma += valor
+        finally:
+            self._lock.release()
+
+    @property
+    def cuenta(self):
+        return sum(self._cuentas)
+
+    def instantanea(self):
+        with self._lock:
+            cuentas = list(self._cuentas)
+            suma = self.suma
+        cuenta = sum(cuentas)
+        acumulado = 0
+        cubetas = []
+        for limite, parcial in zip(self.limites + (float('inf'),), cuentas):
+            acumulado += parcial
+            cubetas.append((limite, acumulado))
+        return {'cubetas': cubetas, 'suma': suma, 'cuenta': cuenta}
+
+    def reiniciar(self):
+        with self._lock:
+            self._cuentas = [0] * (len(self.limites) + 1)
+            self.suma = 0.0
+
+
+class Registro:
+    '''
+    Registro de métricas en memoria. Cada métrica se identifica por nombre y
+    etiquetas; instantanea() devuelve todos los valores, a_prometheus() los vuelca
+    en formato de texto de Prometheus y los exportadores reciben la instantánea
+    cada vez que se llama a exportar().
+    '''
+    _TIPOS = {Contador: 'counter', Medidor: 'gauge', Histograma: 'histogram'}
+
+    def __init__(self):
+        self._metricas = {}
+        self._ayudas = {}
+        self._sentencias = {}
+        self._exportadores = []
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+
+    def _obtener(self, clase, nombre, ayuda, etiquetas, **kwargs):
+        clave = (nombre, tuple(sorted(etiquetas.items())) if etiquetas else ())
+        metrica = self._metricas.get(clave)
+        if metrica is None:
+            with self._lock:
+                metrica = self._metricas.get(clave)
+                if metrica is None:
+                    metrica = self._metricas[clave] = clase(**kwargs)
+                    self._ayudas.setdefault(nombre, ayuda)
+        return metrica
+
+    def contador(self, nombre, ayuda='', etiquetas=None):
+        return self._obtener(Contador, nombre, ayuda, etiquetas)
+
+    def medidor(self, nombre, ayuda='', etiquetas=None, funcion=None):
+        return self._obtener(Medidor, nombre, ayuda, etiquetas, funcion=funcion)
+
+    def histograma(self, nombre, ayuda='', etiquetas=None, limites=_LIMITES_LATENCIA):
+        return self._obtener(Histograma, nombre, ayuda, etiquetas, limites=limites)
+
+    def observar_sql(self, sql, segundos):
+        '''Tiempo de ejecución de una sentencia, con una serie por cada texto SQL'''
+        try:
+            histograma = self._sentencias[sql]
+        except KeyError:
+            histograma = self._sentencias[sql] = self.histograma(
+                'db_sentencia_segundos', 'Tiempo de ejecución por sentencia SQL', {'sql': sql})
+        histograma.observar(segundos)
+
+    def instantanea(self):
+        with self._lock:
+            metricas = list(self._metricas.items())
+        return [{'nombre': nombre, 'tipo': self._TIPOS[type(metrica)], 'etiquetas': dict(etiquetas),
+                 'valor': metrica.instantanea()}
+                for (nombre, etiquetas), metrica in metricas]
+
+    def a_prometheus(self):
+        lineas = []
+        vistos = set()
+        for muestra in sorted(self.instantanea(), key=lambda m: m['nombre']):
+            nombre, tipo, valor = muestra['nombre'], muestra['tipo'], muestra['valor']
+            if nombre not in vistos:
+                vistos.add(nombre)
+                lineas.append(f'# HELP {nombre} {self._ayudas.get(nombre, "")}')
+                lineas.append(f'# TYPE {nombre} {tipo}')
+            etiquetas = muestra['etiquetas']
+            if tipo == 'histogram':
+                for limite, acumulado in valor['cubetas']:
+                    le = '+Inf' if limite == float('inf') else repr(limite)
+                    lineas.append(f'{nombre}_bucket{_etiquetas(etiquetas, le=le)} {acumulado}')
+                lineas.append(f'{nombre}_sum{_etiquetas(etiquetas)} {valor["suma"]}')
+                lineas.append(f'{nombre}_count{_etiquetas(etiquetas)} {valor["cuenta"]}')
+            else:
+                lineas.append(f'{nombre}{_etiquetas(etiquetas)} {valor}')
+        return '\n'.join(lineas) + '\n'
+
+    def agregar_exportador(self, exportador):
+        '''`exportador` es cualquier función que recibe la lista de instantanea()'''
+        self._exportadores.append(exportador)
+
+    def exportar(self):
+        instantanea = self.instantanea()
+        for exportador in self._exportadores:
+            try:
+                exportador(instantanea)
+            except Exception as e:
+                log.error('Error en el exportador de métricas %s: %s', exportador, e)
+
+    def iniciar_exportacion(self, intervalo):
+        def exportar_periodicamente():
+            while not self._parar.wait(intervalo):
+                self.exportar()
+        threading.Thread(target=exportar_periodicamente, name='metricas-exportacion', daemon=True).start()
+
+    def detener_exportacion(self):
+        self._parar.set()
+
+    def reiniciar(self):
+        '''
+        Pone a cero todas las métricas sin quitarlas del registro: los módulos
+        guardan referencias a las suyas (p.ej. _COMMIT en cursor_del_pool) y
+        tienen que seguir exportándose
+        '''
+        with self._lock:
+            metricas = list(self._metricas.values())
+        for metrica in metricas:
+            metrica.reiniciar()
+
+
+def _etiquetas(etiquetas, **extra):
+    todas = {**etiquetas, **extra}
+    if not todas:
+        return ''
+    pares = ','.join(f'{clave}="{_escapar(str(valor))}"' for clave, valor in todas.items())
+    return '{' + pares + '}'
+
+
+def _escapar(valor):
+    return valor.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def exportar_a_log(instantanea):
+    '''Exportador sencillo que vuelca la instantánea en el log a nivel INFO'''
+    log.info('Métricas: %s', instantanea)
+
+
+class Cronometro:
+    '''with Cronometro(histograma): ... observa la duración del bloque en segundos'''
+    __slots__ = ('_histograma', '_inicio')
+
+    def __init__(self, histograma):
+        self._histograma = histograma
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        self._histograma.observar(time.perf_counter() - self._inicio)
+
+
+REGISTRO = Registro()
+
+if __name__ == '__main__':
+    peticiones = REGISTRO.contador('peticiones_total', 'Peticiones atendidas', {'ruta': '/'})
+    latencia = REGISTRO.histograma('peticion_segundos', 'Latencia de las peticiones')
+    for _ in range(5):
+        peticiones.inc()
+        with Cronometro(latencia):
+            time.sleep(0.001)
+    REGISTRO.observar_sql('SELECT 1', 0.0003)
+    print(REGISTRO.a_prometheus())
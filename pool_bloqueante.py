@@ -0,0 +1,290 @@
+import threading
+import time
+from collections import deque
+
+from logger_base import log
+
+
+class PoolAgotadoError(Exception):
+    '''Se lanza cuando no se obtiene una conexión del pool dentro del timeout'''
+
+    def __init__(self, timeout):
+        super().__init__(f'No hay conexiones libres en el pool tras esperar {timeout} segundos')
+        self.timeout = timeout
+
+
+class _Espera:
+    # Hilo en la cola de espera: recibe la conexión directamente de quien la libera
+    __slots__ = ('evento', 'conexion', 'crear')
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.conexion = None
+        self.crear = False
+
+
+class _Registro:
+    # Metadatos de cada conexión para la validación, caducidad e inactividad
+    __slots__ = ('creada', 'ultimo_uso', 'ultima_validacion')
+
+    def __init__(self, ahora):
+        self.creada = ahora
+        self.ultimo_uso = ahora
+        self.ultima_validacion = ahora
+
+
+def validar_conexion(conexion):
+    '''Comprobación de vida barata: SELECT 1 y se deshace la transacción abierta'''
+    if conexion.closed:
+        return False
+    try:
+        cursor = conexion.cursor()
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+        cursor.close()
+        conexion.rollback()
+        return True
+    except Exception as e:
+        log.warning('Conexión no válida, se descarta: %s', e)
+        return False
+
+
+class PoolBloqueante:
+    '''
+    Pool de conexiones thread-safe y acotado.
+    Si no hay conexiones libres y ya se alcanzó maxconn, getconn() espera
+    (en orden FIFO) hasta que otro hilo libere una o hasta agotar el timeout.
+    Opcionalmente valida las conexiones al entregarlas (como mucho una vez cada
+    intervalo_validacion segundos), las recicla al superar max_vida, cierra las
+    inactivas más de max_inactividad y mantiene precalentadas minconn conexiones
+    desde un hilo de mantenimiento.
+    '''
+
+    def __init__(self, minconn, maxconn, fabrica, timeout=None, max_vida=None, max_inactividad=None,
+                 intervalo_validacion=None, intervalo_mantenimiento=None, validador=validar_conexion):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError(f'Tamaños de pool inválidos: min={minconn}, max={maxconn}')
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.max_vida = max_vida
+        self.max_inactividad = max_inactividad
+        self.intervalo_validacion = intervalo_validacion
+        self._fabrica = fabrica
+        self._validador = validador
+        self._lock = threading.Lock()
+        self._libres = deque()
+        self._en_uso = {}
+        self._info = {}
+        self._esperas = deque()
+        self._total = 0
+        self.closed = False
+        self._parar = threading.Event()
+        self._hilo = None
+        if intervalo_mantenimiento:
+            # El precalentamiento hasta minconn lo hace el hilo de mantenimiento
+            self._hilo = threading.Thread(target=self._mantener, args=(intervalo_mantenimiento,),
+                                          name='pool-mantenimiento', daemon=True)
+            self._hilo.start()
+        else:
+            for _ in range(minconn):
+                self._libres.append(self._crear())
+                self._total += 1
+
+    def _crear(self):
+        conexion = self._fabrica()
+        self._info[id(conexion)] = _Registro(time.monotonic())
+        return conexion
+
+    def _caducada(self, info, ahora):
+        return self.max_vida is not None and ahora - info.creada > self.max_vida
+
+    def getconn(self, timeout=None):
+        '''Con timeout=0 no espera: si no hay conexión libre lanza PoolAgotadoError en el momento'''
+        if timeout is None:
+            timeout = self.timeout
+        conexion = espera = None
+        with self._lock:
+            if self.closed:
+                raise PoolAgotadoError(0)
+            # Solo se atiende directamente si nadie espera antes (orden FIFO)
+            if not self._esperas and self._libres:
+                conexion = self._libres.pop()
+                self._en_uso[id(conexion)] = conexion
+            elif not self._esperas and self._total < self.maxconn:
+                self._total += 1
+            elif timeout == 0:
+                # Solo intentarlo: sin ponerse en la cola ni avisar (p.ej. al saltar
+                # una réplica ocupada), quien llama decide qué hacer
+                raise PoolAgotadoError(0)
+            else:
+                espera = _Espera()
+                self._esperas.append(espera)
+        if conexion is not None:
+            return self._revisar(conexion)
+        if espera is None:
+            return self._crear_en_uso()
+        return self._esperar(espera, timeout)
+
+    def _revisar(self, conexion):
+        # Se descarta la conexión caducada o que no pasa la validación, conservando su hueco
+        info = self._info.get(id(conexion))
+        ahora = time.monotonic()
+        if info is not None and not self._caducada(info, ahora):
+            if self.intervalo_validacion is None or ahora - info.ultima_validacion < self.intervalo_validacion:
+                return conexion
+            if self._validador(conexion):
+                info.ultima_validacion = ahora
+                return conexion
+        else:
+            log.debug('Conexión reciclada por superar la vida máxima: %s', conexion)
+        with self._lock:
+            self._en_uso.pop(id(conexion), None)
+        self._cerrar(conexion)
+        return self._crear_en_uso()
+
+    def _esperar(self, espera, timeout):
+        inicio = time.monotonic()
+        espera.evento.wait(timeout)
+        with self._lock:
+            if not espera.evento.is_set():
+                self._esperas.remove(espera)
+                log.warning('Timeout esperando conexión del pool (%ss)', timeout)
+                raise PoolAgotadoError(timeout)
+            if self.closed:
+                raise PoolAgotadoError(0)
+            conexion = espera.conexion
+            if conexion is not None:
+                self._en_uso[id(conexion)] = conexion
+        log.debug('Conexión obtenida tras esperar %.4fs', time.monotonic() - inicio)
+        if espera.crear:
+            # Se nos cedió el hueco de una conexión descartada: creamos una nueva
+            return self._crear_en_uso()
+        return self._revisar(conexion)
+
+    def _crear_en_uso(self):
+        # El hueco ya está reservado en self._total; si falla la creación se devuelve
+        try:
+            conexion = self._crear()
+        except Exception:
+            self._liberar_hueco()
+            raise
+        with self._lock:
+            self._en_uso[id(conexion)] = conexion
+        return conexion
+
+    def _liberar_hueco(self):
+        with self._lock:
+            if self._esperas:
+                espera = self._esperas.popleft()
+                espera.crear = True
+                espera.evento.set()
+            else:
+                self._total -= 1
+
+    def putconn(self, conexion, close=False):
+        with self._lock:
+            if self._en_uso.pop(id(conexion), None) is None:
+                raise KeyError('La conexión no pertenece a este pool')
+            if not (close or self.closed or conexion.closed):
+                info = self._info.get(id(conexion))
+                if info is not None:
+                    # Una conexión que vuelve sana cuenta como validada
+                    info.ultimo_uso = info.ultima_validacion = time.monotonic()
+                self._entregar(conexion)
+                return
+        self._cerrar(conexion)
+        self._liberar_hueco()
+
+    def _entregar(self, conexion):
+        # Con el lock tomado: se cede al primer hilo en espera o vuelve a las libres
+        if self._esperas:
+            espera = self._esperas.popleft()
+            espera.conexion = conexion
+            espera.evento.set()
+        else:
+            self._libres.append(conexion)
+
+    def _cerrar(self, conexion):
+        self._info.pop(id(conexion), None)
+        try:
+            if not conexion.closed:
+                conexion.close()
+        except Exception as e:
+            log.warning('Error al cerrar conexión descartada: %s', e)
+
+    def _mantener(self, intervalo):
+        while not self.closed:
+            try:
+                self.mantener()
+            except Exception as e:
+                log.error('Error en el mantenimiento del pool: %s', e)
+            if self._parar.wait(intervalo):
+                break
+
+    def mantener(self):
+        '''Cierra las conexiones libres caducadas o inactivas y precalienta hasta minconn'''
+        ahora = time.monotonic()
+        descartadas = []
+        with self._lock:
+            conservar = deque()
+            # Las libres más antiguas están a la izquierda (getconn saca por la derecha)
+            for conexion in self._libres:
+                info = self._info.get(id(conexion))
+                inactiva = (self.max_inactividad is not None and info is not None
+                            and ahora - info.ultimo_uso > self.max_inactividad
+                            and self._total - len(descartadas) > self.minconn)
+                if info is None or self._caducada(info, ahora) or inactiva:
+                    descartadas.append(conexion)
+                else:
+                    conservar.append(conexion)
+            self._libres = conservar
+            self._total -= len(descartadas)
+        for conexion in descartadas:
+            self._cerrar(conexion)
+        if descartadas:
+            log.debug('Mantenimiento del pool: %s conexiones cerradas', len(descartadas))
+        while True:
+            with self._lock:
+                if self.closed or self._total >= self.minconn:
+                    break
+                self._total += 1
+            try:
+                conexion = self._crear()
+            except Exception as e:
+                log.error('No se pudo precalentar una conexión del pool: %s', e)
+                self._liberar_hueco()
+                break
+            with self._lock:
+                self._entregar(conexion)
+
+    def closeall(self):
+        self._parar.set()
+        with self._lock:
+            self.closed = True
+            conexiones = list(self._libres) + list(self._en_uso.values())
+            self._libres.clear()
+            self._en_uso.clear()
+            self._total = 0
+            esperas = list(self._esperas)
+            self._esperas.clear()
+        for espera in esperas:
+            espera.evento.set()
+        for conexion in conexiones:
+            self._cerrar(conexion)
+
+    @property
+    def en_uso(self):
+        return len(self._en_uso)
+
+    @property
+    def libres(self):
+        return len(self._libres)
+
+    @property
+    def esperando(self):
+        return len(self._esperas)
+
+    def __str__(self):
+        return (f'PoolBloqueante(min={self.minconn}, max={self.maxconn}, en_uso={self.en_uso}, '
+                f'libres={self.libres}, esperando={self.esperando})')
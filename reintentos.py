@@ -0,0 +1,88 @@
+import os
+import random
+import sys
+import time
+
+from logger_base import log
+from conexion import Conexion
+from metricas import REGISTRO
+from cursor_del_pool import CursorDelPool, UnidadDeTrabajo
+
+# Errores con SQLSTATE que suelen resolverse repitiendo la transacción:
+# conflicto de serialización, deadlock, servidor reiniciándose o sin conexiones
+# libres. La clase 08 (excepciones de conexión) se comprueba por prefijo.
+_CODIGOS_TRANSITORIOS = {'40001', '40P01', '57P01', '57P02', '57P03', '53300'}
+
+# Valores por defecto (intentos, pausa base, pausa máxima, presupuesto), configurables
+# desde el entorno. Se leen en la primera llamada, no al importar el módulo, después
+# de que Conexion.configurar() cargue el .env.
+_configuracion = None
+
+
+def _valores_por_defecto():
+    global _configuracion
+    if _configuracion is None:
+        Conexion.configurar()
+        _configuracion = (int(os.getenv('DB_REINTENTOS', 4)),
+                          float(os.getenv('DB_REINTENTO_BASE', 0.05)),
+                          float(os.getenv('DB_REINTENTO_MAXIMO', 2.0)),
+                          float(os.getenv('DB_REINTENTO_PRESUPUESTO', 10.0)))
+    return _configuracion
+
+
+def es_conexion_rota(error):
+    '''OperationalError/InterfaceError sin SQLSTATE: se perdió la conexión con el servidor'''
+    # Si psycopg2 no está cargado el error no puede venir de él
+    psycopg2 = sys.modules.get('psycopg2')
+    if psycopg2 is None:
+        return False
+    return (isinstance(error, (psycopg2.OperationalError, psycopg2.InterfaceError))
+            and getattr(error, 'pgcode', None) is None)
+
+
+def es_transitorio(error):
+    codigo = getattr(error, 'pgcode', None)
+    if codigo is not None:
+        return codigo in _CODIGOS_TRANSITORIOS or codigo.startswith('08')
+    return es_conexion_rota(error)
+
+
+def ejecutar_con_reintentos(funcion, *args, intentos=None, pausa_base=None, pausa_maxima=None,
+                            presupuesto=None, servidor=False, itersize=None, **kwargs):
+    '''
+    Ejecuta funcion(cursor, *args, **kwargs) en una transacción de CursorDelPool y
+    la repite entera si falla por un error transitorio. Entre intentos espera un
+    backoff exponencial con jitter completo, sin superar `presupuesto` segundos en
+    total. Cada intento empieza una transacción nueva, así que `funcion` debe poder
+    repetirse y consumir los resultados antes de volver. Dentro de una
+    UnidadDeTrabajo no se reintenta: la transacción es de la unidad, no de `funcion`.
+    '''
+    intentos_defecto, base_defecto, maxima_defecto, presupuesto_defecto = _valores_por_defecto()
+    intentos = intentos or intentos_defecto
+    pausa_base = pausa_base or base_defecto
+    pausa_maxima = pausa_maxima or maxima_defecto
+    limite = time.monotonic() + (presupuesto or presupuesto_defecto)
+    for intento in range(1, intentos + 1):
+        try:
+            with CursorDelPool(servidor, itersize) as cursor:
+                return funcion(cursor, *args, **kwargs)
+        except Exception as e:
+            if intento == intentos or not es_transitorio(e) or UnidadDeTrabajo.activa():
+                raise
+            pausa = random.uniform(0, min(pausa_maxima, pausa_base * 2 ** (intento - 1)))
+            if time.monotonic() + pausa > limite:
+                log.warning('Presupuesto de reintentos agotado tras %s intentos: %s', intento, e)
+                raise
+            REGISTRO.contador('db_reintentos_total', 'Transacciones repetidas por errores transitorios',
+                              {'codigo': getattr(e, 'pgcode', None) or 'conexion'}).inc()
+            log.warning('Error transitorio (intento %s de %s), se reintenta en %.3fs: %s',
+                        intento, intentos, pausa, e)
+            time.sleep(pausa)
+
+
+if __name__ == '__main__':
+    def contar_personas(cursor):
+        cursor.execute('SELECT count(*) FROM persona')
+        return cursor.fetchone()[0]
+
+    log.info('Personas: %s', ejecutar_con_reintentos(contar_personas))
@@ -0,0 +1,46 @@
+'''
+Modo LOG_MODO=cola de logger_base:
+
+    python -m unittest test_logger_cola
+'''
+import io
+import logging
+import queue
+import unittest
+
+from logger_cola import ListenerPorLotes, ManejadorCola
+
+
+def registro(mensaje):
+    return logging.LogRecord('prueba', logging.INFO, __file__, 0, mensaje, None, None)
+
+
+class DescartadosTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cola = queue.Queue(3)
+        self.manejador = ManejadorCola(self.cola)
+        self.salida = io.StringIO()
+        self.listener = ListenerPorLotes(self.cola, logging.StreamHandler(self.salida),
+                                         manejador_cola=self.manejador, intervalo_aviso=3600)
+
+    def test_avisa_al_parar(self):
+        # Sin listener en marcha la cola se llena y los dos últimos se descartan
+        for i in range(5):
+            self.manejador.enqueue(registro(f'mensaje {i}'))
+        self.assertEqual(self.manejador.descartados, 2)
+        self.listener.start()
+        self.listener.stop()
+        lineas = self.salida.getvalue().splitlines()
+        self.assertEqual(lineas[:3], ['mensaje 0', 'mensaje 1', 'mensaje 2'])
+        self.assertEqual(lineas[3:], ['Cola de log llena: 2 registros descartados (2 en total)'])
+
+    def test_sin_descartes_no_avisa(self):
+        self.manejador.enqueue(registro('mensaje'))
+        self.listener.start()
+        self.listener.stop()
+        self.assertEqual(self.salida.getvalue(), 'mensaje\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
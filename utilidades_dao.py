@@ -0,0 +1,67 @@
+import time
+from array import array
+from itertools import islice
+
+from metricas import REGISTRO
+
+
+def dividir_en_lotes(iterable, tamano):
+    '''Recorre cualquier iterable en listas de como mucho `tamano` elementos'''
+    if tamano < 1:
+        raise ValueError(f'Tamaño de lote inválido: {tamano}')
+    iterador = iter(iterable)
+    while lote := list(islice(iterador, tamano)):
+        yield lote
+
+
+def ejecutar_valores(cursor, sql, filas, fetch=False):
+    '''
+    Ejecuta `sql`, cuyo único %s es la lista VALUES, para todas las filas en
+    una sola sentencia multi-fila (un único viaje al servidor). Los cursores de
+    otros backends pueden traer su propio ejecutar_valores (ver backend_sqlite).
+    '''
+    cursor = getattr(cursor, 'cursor_real', cursor)
+    # Se mide aquí, con la plantilla como etiqueta, y no en cada execute compuesto
+    inicio = time.perf_counter()
+    try:
+        if hasattr(cursor, 'ejecutar_valores'):
+            return cursor.ejecutar_valores(sql, filas, fetch=fetch)
+        from psycopg2.extras import execute_values
+        return execute_values(cursor, sql, filas, page_size=len(filas), fetch=fetch)
+    finally:
+        REGISTRO.observar_sql(sql, time.perf_counter() - inicio)
+
+
+def importar_numpy():
+    '''NumPy solo hace falta en el modo columnar: se importa al usarlo, antes de pedir conexión'''
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError('El modo columnar necesita NumPy: pip install numpy') from e
+    return numpy
+
+
+def leer_columnas(cursor, nombres, numericas=(), tamano_bloque=10000):
+    '''
+    Lee el resultado del cursor en bloques de fetchmany y lo devuelve por columnas
+    ({nombre: array de NumPy}) sin crear un objeto por fila. Las columnas de
+    `numericas` se guardan como int64 y el resto como arrays de objetos que
+    comparten las cadenas leídas (None -> ''), rellenados bloque a bloque.
+    '''
+    np = importar_numpy()
+    enteros = {nombre: array('q') for nombre in nombres if nombre in numericas}
+    textos = {nombre: [] for nombre in nombres if nombre not in numericas}
+    while registros := cursor.fetchmany(tamano_bloque):
+        for nombre, valores in zip(nombres, zip(*registros)):
+            if nombre in enteros:
+                enteros[nombre].extend(valores)
+            else:
+                textos[nombre].append(np.array(['' if valor is None else valor for valor in valores], dtype=object))
+    columnas = {}
+    for nombre in nombres:
+        if nombre in enteros:
+            columnas[nombre] = np.frombuffer(enteros[nombre], dtype=np.int64)
+        else:
+            bloques = textos[nombre]
+            columnas[nombre] = np.concatenate(bloques) if bloques else np.empty(0, dtype=object)
+    return columnas